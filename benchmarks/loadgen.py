@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _raise_file_limit(needed: int):
+    # Every connection is a file descriptor on both ends
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        limit = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+
+
+class LoadResult:
+    def __init__(self):
+        self.latencies: List[float] = []  # Seconds per request
+        self.sessions = 0
+        self.hands = 0
+        self.errors = 0
+
+
+async def _request(reader, writer, request: bytes, result: LoadResult) -> Dict:
+    start = time.perf_counter()
+    writer.write(request)
+    line = await reader.readline()
+    result.latencies.append(time.perf_counter() - start)
+    if not line:
+        raise ConnectionError("server closed the connection")
+    return json.loads(line)
+
+
+async def _session(address, hands: int, bet: int, rng: random.Random, result: LoadResult, start_gate):
+    await start_gate.wait()
+    try:
+        if isinstance(address, str):
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*address)
+    except OSError:
+        result.errors += 1
+        return
+    place_bet = json.dumps({'cmd': 'place_bet', 'amount': bet}).encode() + b'\n'
+    deal = b'{"cmd": "deal"}\n'
+    draw = b'{"cmd": "draw"}\n'
+    try:
+        for _ in range(hands):
+            response = await _request(reader, writer, place_bet, result)
+            if not response['ok']:
+                break  # Out of credits
+            await _request(reader, writer, deal, result)
+            held = [i for i in range(5) if rng.random() < 0.5]
+            await _request(reader, writer, json.dumps({'cmd': 'hold', 'cards': held}).encode() + b'\n', result)
+            await _request(reader, writer, draw, result)
+            result.hands += 1
+        result.sessions += 1
+    except (OSError, ValueError):
+        result.errors += 1
+    finally:
+        writer.close()
+
+
+async def run_load(address, connections: int, sessions: int, hands: int, bet: int = 5, seed: int = 0) -> Dict:
+    """Play sessions against a server with up to connections open at once.
+
+    address is (host, port) or a Unix socket path. Each session connects,
+    plays hands (bet, deal, random holds, draw) and disconnects. Reports the
+    latency percentiles of single requests and the session and request rates.
+    """
+    result = LoadResult()
+    rng = random.Random(seed)
+    start_gate = asyncio.Event()
+    pending = sessions
+    running = set()
+
+    def launch():
+        nonlocal pending
+        pending -= 1
+        task = asyncio.ensure_future(_session(address, hands, bet, rng, result, start_gate))
+        running.add(task)
+        task.add_done_callback(on_done)
+
+    def on_done(task):
+        running.discard(task)
+        if pending > 0:
+            launch()
+
+    for _ in range(min(connections, sessions)):
+        launch()
+    start = time.perf_counter()
+    start_gate.set()
+    while running:
+        await asyncio.gather(*list(running))
+    seconds = time.perf_counter() - start
+
+    latencies = sorted(result.latencies)
+
+    def percentile(q):
+        return latencies[min(int(q / 100 * len(latencies)), len(latencies) - 1)] * 1000 if latencies else None
+
+    return {
+        'connections': connections,
+        'sessions': result.sessions,
+        'hands': result.hands,
+        'requests': len(latencies),
+        'errors': result.errors,
+        'seconds': seconds,
+        'sessions_per_sec': result.sessions / seconds,
+        'requests_per_sec': len(latencies) / seconds,
+        'latency_ms': {'p50': percentile(50), 'p90': percentile(90), 'p99': percentile(99),
+                       'max': latencies[-1] * 1000 if latencies else None},
+    }
+
+
+def _spawn_server(unix_path: Optional[str], credits: int) -> Tuple[subprocess.Popen, object]:
+    command = [sys.executable, '-m', 'game.server', '--credits', str(credits)]
+    command += ['--unix', unix_path] if unix_path else ['--port', '0']
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    # Skip the server's own log lines up to the address it announces
+    for line in server.stdout:
+        if line.startswith("Listening on "):
+            break
+    else:
+        server.kill()
+        raise RuntimeError("server exited before listening")
+    if unix_path:
+        return server, unix_path
+    host, port = line.split()[-1].rsplit(':', 1)
+    return server, (host, int(port))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test game.server with many concurrent sessions")
+    parser.add_argument('--connections', type=int, default=10000, help="sessions open at once (default: 10000)")
+    parser.add_argument('--sessions', type=int, help="sessions to play in total (default: --connections)")
+    parser.add_argument('--hands', type=int, default=5, help="hands per session (default: 5)")
+    parser.add_argument('--credits', type=int, default=100, help="starting credits of a spawned server")
+    parser.add_argument('--connect', metavar='HOST:PORT', help="use a running server instead of spawning one")
+    parser.add_argument('--unix', metavar='PATH', help="Unix socket of a running server")
+    parser.add_argument('--spawn-unix', action='store_true', help="spawn the server on a Unix socket instead of TCP")
+    parser.add_argument('--output', help="also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+    sessions = args.sessions or args.connections
+    # One descriptor per connection here, and one in a spawned server, which inherits the limit
+    _raise_file_limit(args.connections + 100)
+
+    server = None
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        address = (host, int(port))
+    elif args.unix:
+        address = args.unix
+    else:
+        unix_path = os.path.join(tempfile.mkdtemp(), 'poker.sock') if args.spawn_unix else None
+        server, address = _spawn_server(unix_path, args.credits)
+    try:
+        result = asyncio.run(run_load(address, args.connections, sessions, args.hands))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latency = result['latency_ms']
+    print(f"{result['sessions']:,} sessions ({result['hands']:,} hands, {result['requests']:,} requests) "
+          f"over {args.connections:,} concurrent connections in {result['seconds']:.1f}s, {result['errors']} errors")
+    print(f"  {result['sessions_per_sec']:,.0f} sessions/sec, {result['requests_per_sec']:,.0f} requests/sec")
+    if latency['p50'] is not None:
+        print(f"  Latency p50 {latency['p50']:.2f} ms, p90 {latency['p90']:.2f} ms, p99 {latency['p99']:.2f} ms, "
+              f"max {latency['max']:.2f} ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    return 1 if result['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
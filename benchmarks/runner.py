@@ -0,0 +1,245 @@
+import os
+import sys
+import gc
+import json
+import time
+import logging
+import random
+import argparse
+import platform
+import itertools
+import subprocess
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+# Rendering is measured without a window; must be set before pygame is imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)  # test_endurance.py lives at the top level
+
+from game.logger import game_logger
+from game.poker_game import PokerGame
+
+# Allowed slowdown before a result counts as a regression (0.10 = 10%)
+DEFAULT_TOLERANCE = 0.10
+
+
+def _best_time(run: Callable[[], None], repeat: int) -> float:
+    """Shortest wall time of repeat runs, with the garbage collector paused"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def _rate(count: int, seconds: float, unit: str) -> Dict:
+    return {'value': count / seconds, 'unit': unit, 'higher_is_better': True, 'count': count, 'seconds': seconds}
+
+
+def bench_evaluate_hand(quick: bool, repeat: int) -> Dict:
+    """PokerGame.evaluate_hand over every 5-card hand (every 13th hand with --quick)"""
+    game = PokerGame(credits=1000)
+    game.current_bet = 1
+    hands = list(itertools.islice(itertools.combinations(range(52), 5), 0, None, 13 if quick else 1))
+    hand_codes = game.hand_codes  # What evaluate_hand scores
+    evaluate_hand = game.evaluate_hand
+
+    def run():
+        for codes in hands:
+            hand_codes[:] = codes
+            evaluate_hand()
+
+    return _rate(len(hands), _best_time(run, repeat), 'hands/sec')
+
+
+def bench_deal_draw(quick: bool, repeat: int) -> Dict:
+    """deal_initial_hand + draw_new_cards cycles, discarding the whole hand"""
+    cycles = 20000 if quick else 200000
+    game = PokerGame(rng=random.Random(1), credits=1000)
+
+    def run():
+        for _ in range(cycles):
+            game.game_state = "betting"
+            game.current_bet = 5
+            game.deal_initial_hand()
+            game.draw_new_cards()
+
+    return _rate(cycles, _best_time(run, repeat), 'cycles/sec')
+
+
+def bench_simulate_game(quick: bool, repeat: int) -> Dict:
+    """test_endurance.simulate_game with the optimal strategy, never running out of credits"""
+    from test_endurance import simulate_game
+    hands = 5000 if quick else 50000
+    # Open the strategy table (or warm the solver) outside the timed runs
+    simulate_game(10, rng=random.Random(0), starting_credits=1000)
+    seconds = _best_time(lambda: simulate_game(hands, rng=random.Random(2), starting_credits=hands * 5), repeat)
+    return _rate(hands, seconds, 'hands/sec')
+
+
+def bench_draw_frame(quick: bool, repeat: int) -> Dict:
+    """GameWindow.draw while holding, as a full redraw and after toggling one hold"""
+    import pygame
+    from ui.game_window import GameWindow
+    pygame.init()
+    try:
+        screen = pygame.display.set_mode((800, 600))
+        game = PokerGame(rng=random.Random(3), credits=1000)
+        window = GameWindow(screen, game)
+        game.place_bet(5)
+        game.deal_initial_hand()
+        window.draw()
+        frames = 200 if quick else 2000
+
+        def full():
+            for _ in range(frames):
+                window.invalidate()
+                window.draw()
+
+        def hold_toggle():
+            for i in range(frames):
+                game.hold_card(i % 5)
+                window.draw()
+
+        full_seconds = _best_time(full, repeat)
+        toggle_seconds = _best_time(hold_toggle, repeat)
+    finally:
+        pygame.quit()
+    return {'value': full_seconds / frames * 1000, 'unit': 'ms/frame', 'higher_is_better': False,
+            'hold_toggle_ms': toggle_seconds / frames * 1000, 'frames': frames,
+            'video_driver': os.environ['SDL_VIDEODRIVER']}
+
+
+BENCHMARKS = {
+    'evaluate_hand': bench_evaluate_hand,
+    'deal_draw': bench_deal_draw,
+    'simulate_game': bench_simulate_game,
+    'draw_frame': bench_draw_frame,
+}
+
+
+def _version(module_name: str):
+    try:
+        module = __import__(module_name)
+    except ImportError:
+        return None
+    return getattr(module, '__version__', None) or getattr(getattr(module, 'version', None), 'ver', None)
+
+
+def _git_commit():
+    try:
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def environment() -> Dict:
+    """Where and on what the benchmarks ran"""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': _version('numpy'),
+        'pygame': _version('pygame'),
+        'git_commit': _git_commit(),
+        'log_profile': game_logger.profile,
+    }
+
+
+def run_benchmarks(names: List[str], quick: bool = False, repeat: int = 3) -> Dict:
+    """Run the named benchmarks; a benchmark that cannot run (e.g. no pygame) is reported as skipped"""
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            result = BENCHMARKS[name](quick, repeat)
+        except ImportError as e:
+            result = {'skipped': str(e)}
+        result['wall_seconds'] = time.perf_counter() - start
+        results[name] = result
+        print(f"{name}: {_format(result)}", file=sys.stderr)
+    return {'environment': environment(), 'quick': quick, 'repeat': repeat, 'results': results}
+
+
+def _format(result: Dict) -> str:
+    if 'skipped' in result:
+        return f"skipped ({result['skipped']})"
+    return f"{result['value']:,.0f} {result['unit']}" if result['higher_is_better'] else \
+        f"{result['value']:,.3f} {result['unit']}"
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[Dict]:
+    """Compare results with a baseline run; a result is a regression when it is
+    more than tolerance worse than the baseline"""
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None or 'skipped' in result or 'skipped' in base or base['unit'] != result['unit']:
+            continue
+        # Relative change, positive when the current run is better
+        if result['higher_is_better']:
+            change = result['value'] / base['value'] - 1
+        else:
+            change = base['value'] / result['value'] - 1
+        rows.append({'name': name, 'baseline': base['value'], 'current': result['value'], 'unit': result['unit'],
+                     'change': change, 'regression': change < -tolerance})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time evaluation, dealing, simulation and rendering")
+    parser.add_argument('names', nargs='*', metavar='BENCHMARK',
+                        help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--quick', action='store_true', help="smaller workloads, for a fast check")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark; the best one counts")
+    parser.add_argument('--output', help="write the results as JSON to this file (default: stdout)")
+    parser.add_argument('--compare', metavar='BASELINE', help="flag regressions against an earlier JSON result")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a result is a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark {', '.join(unknown)}; choose from {', '.join(BENCHMARKS)}")
+    # Time the game, not the logging; progress goes to stderr so stdout stays valid JSON
+    game_logger.configure('simulation')
+    game_logger.summary_logger.setLevel(logging.WARNING)
+
+    results = run_benchmarks(args.names or list(BENCHMARKS), args.quick, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance)
+        print(f"\nCompared with {args.compare} (tolerance {args.tolerance:.0%}):", file=sys.stderr)
+        for row in rows:
+            flag = "REGRESSION" if row['regression'] else "ok"
+            print(f"{row['name']:>15}: {row['baseline']:>14,.3f} -> {row['current']:>14,.3f} {row['unit']:<10} "
+                  f"{row['change']:+7.1%}  {flag}", file=sys.stderr)
+        if any(row['regression'] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
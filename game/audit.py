@@ -0,0 +1,236 @@
+import os
+import re
+import sys
+import glob
+import mmap
+import time
+import argparse
+import multiprocessing
+from collections import namedtuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from .evaluator import RANKS, SUITS
+from .variants import DEFAULT_VARIANT, VARIANT_DEFINITIONS, get_variant
+
+# The lines of a PokerGame log that the audit reads: the game's variant, the bet,
+# the final hand and the paid result
+_LINE = re.compile(rb"Final hand: \[([^\]\n]*)\]"
+                   rb"|Hand evaluation: ([^\n]*), Winnings: (-?\d+)"
+                   rb"|Dealing initial hand with bet: (\d+)"
+                   rb"|Game initialized with -?\d+ credits(?: \(([^)\n]*)\))?")
+_CONTEXT_MARKERS = (b"Game initialized with ", b"Dealing initial hand with bet: ", b"Final hand: [")
+
+# Card as logged, e.g. 'J♠' -> its card code
+_CARD_CODES = {f"'{rank}{suit}'".encode(): rank_index * 4 + suit_index
+               for rank_index, rank in enumerate(RANKS) for suit_index, suit in enumerate(SUITS)}
+_TITLES = {definition[0]: name for name, definition in VARIANT_DEFINITIONS.items()}
+
+CHUNK_BYTES = 1 << 22
+
+Mismatch = namedtuple('Mismatch', ['path', 'line', 'message'])
+
+
+class _Segment:
+    """Sequential audit state over one byte range of a log file"""
+
+    def __init__(self, path: str, default_variant: str, max_report: int):
+        self.path = path
+        self.variant = get_variant(default_variant)
+        self.unknown_title = None
+        self.bet = None
+        self.final = None  # Raw final hand of the current hand, until the next deal
+        self.hands = 0
+        self.mismatches = 0
+        self.report: List[Tuple[int, str]] = []  # (line within the segment, message), at most max_report
+        self.max_report = max_report
+
+    def feed(self, match) -> Optional[str]:
+        """Apply one matched line; returns a message if it is a paid result that does not check out"""
+        final, hand_type, winnings, bet, title = match.groups()
+        if final is not None:
+            self.final = final
+        elif hand_type is not None:
+            self.hands += 1
+            return self.check(hand_type, int(winnings))
+        elif bet is not None:
+            self.bet = int(bet)
+            self.final = None
+        else:
+            self.final = None
+            if title is None:
+                return None  # Written before variants existed: keep the default
+            name = _TITLES.get(title.decode('utf-8', 'replace'))
+            self.unknown_title = None if name else title
+            if name:
+                self.variant = get_variant(name)
+        return None
+
+    def check(self, hand_type: bytes, winnings: int) -> Optional[str]:
+        logged = f"logged {hand_type.decode('utf-8', 'replace')!r} paying {winnings}"
+        if self.unknown_title is not None:
+            return f"{logged} in an unknown game {self.unknown_title.decode('utf-8', 'replace')!r}"
+        if self.final is None:
+            return f"{logged} without a final hand"
+        if self.bet is None:
+            return f"{logged} without a bet"
+        codes = [_CARD_CODES.get(card) for card in self.final.split(b", ")]
+        if len(codes) != 5 or None in codes or len(set(codes)) != 5:
+            return f"{logged} for an unreadable final hand [{self.final.decode('utf-8', 'replace')}]"
+        variant = self.variant
+        category = variant.evaluate(codes)
+        expected_type, expected = variant.hand_names[category], self.bet * variant.payouts[category]
+        if winnings != expected or hand_type.decode('utf-8', 'replace') != expected_type:
+            return (f"{logged}, but [{self.final.decode('utf-8')}] is {expected_type!r} paying {expected} "
+                    f"at a bet of {self.bet} ({variant.title})")
+        return None
+
+
+def _align(mm, position: int) -> int:
+    # Start of the first line at or after position
+    if position <= 0:
+        return 0
+    newline = mm.find(b"\n", position - 1)
+    return newline + 1 if newline >= 0 else len(mm)
+
+
+def marker_offsets(task) -> Tuple[int, ...]:
+    """Offset of the last line of each _CONTEXT_MARKERS kind in [start, end) of a log file, or -1"""
+    path, start, end = task
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return (-1,) * len(_CONTEXT_MARKERS)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start, end = _align(mm, start), _align(mm, end)
+            return tuple(mm.rfind(marker, start, end) for marker in _CONTEXT_MARKERS)
+
+
+def audit_segment(task) -> Dict:
+    """Audit the lines that start in [start, end) of a log file.
+
+    context holds the offsets of the lines that give the state a sequential
+    reader would have at the first line (variant, bet, final hand); audit()
+    finds them with marker_offsets, so segments of one file are audited
+    independently. Memory use is bounded by the chunk size; line numbers are
+    relative to the segment.
+    """
+    path, start, end, default_variant, max_report, context = task
+    segment = _Segment(path, default_variant, max_report)
+    lines = 0
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {'path': path, 'start': start, 'lines': 0, 'hands': 0, 'mismatches': 0, 'report': []}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start, end = _align(mm, start), _align(mm, end)
+            for position in context:
+                line_end = mm.find(b"\n", position)
+                match = _LINE.match(mm[position:line_end if line_end >= 0 else len(mm)])
+                if match:
+                    segment.feed(match)
+            position = start
+            while position < end:
+                chunk_end = min(position + CHUNK_BYTES, end)
+                if chunk_end < end:
+                    # Matches never span chunks: cut after the last complete line
+                    newline = mm.rfind(b"\n", position, chunk_end)
+                    if newline >= 0:
+                        chunk_end = newline + 1
+                chunk = mm[position:chunk_end]
+                counted, line = 0, lines
+                for match in _LINE.finditer(chunk):
+                    message = segment.feed(match)
+                    if message is not None:
+                        segment.mismatches += 1
+                        if len(segment.report) < max_report:
+                            line += chunk.count(b"\n", counted, match.start())
+                            counted = match.start()
+                            segment.report.append((line + 1, message))
+                lines += chunk.count(b"\n")
+                position = chunk_end
+    return {'path': path, 'start': start, 'lines': lines, 'hands': segment.hands,
+            'mismatches': segment.mismatches, 'report': segment.report}
+
+
+def log_files(patterns: Sequence[str]) -> List[str]:
+    """Files named by paths, directories (their poker_game_*.log) and glob patterns"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(sorted(glob.glob(os.path.join(pattern, 'poker_game_*.log'))))
+        else:
+            files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return files
+
+
+def audit(paths: Sequence[str], workers: Optional[int] = None, variant: str = DEFAULT_VARIANT,
+          segment_bytes: int = 64 << 20, max_report: int = 1000) -> Iterator[Dict]:
+    """Audit log files in parallel, yielding one result per file in order.
+
+    Files are split into segments of segment_bytes, audited across worker
+    processes. Each result has the file's path, size, hands, mismatch count
+    and up to max_report Mismatch(path, line, message) entries.
+    """
+    segments = []
+    for path in paths:
+        size = os.path.getsize(path)
+        segments.extend((path, start, min(start + segment_bytes, size))
+                        for start in range(0, max(size, 1), segment_bytes))
+    workers = workers or os.cpu_count() or 1
+    with multiprocessing.Pool(min(workers, max(len(segments), 1))) as pool:
+        # Pre-pass: the last variant, bet and final-hand lines before each segment
+        tasks = []
+        last = None
+        for (path, start, end), offsets in zip(segments, pool.map(marker_offsets, segments)):
+            if start == 0:
+                last = (-1,) * len(_CONTEXT_MARKERS)
+            context = sorted(position for position in last if position >= 0)
+            tasks.append((path, start, end, variant, max_report, context))
+            last = tuple(max(position, previous) for position, previous in zip(offsets, last))
+        current = None
+        for result in pool.imap(audit_segment, tasks):
+            if current is None or current['path'] != result['path'] or result['start'] == 0:
+                if current is not None:
+                    yield current
+                current = {'path': result['path'], 'size': os.path.getsize(result['path']), 'lines': 0,
+                           'hands': 0, 'mismatches': 0, 'report': []}
+            # Segment line numbers start after the lines of the file's earlier segments
+            room = max_report - len(current['report'])
+            current['report'].extend(Mismatch(result['path'], current['lines'] + line, message)
+                                     for line, message in result['report'][:room])
+            for key in ('lines', 'hands', 'mismatches'):
+                current[key] += result[key]
+        if current is not None:
+            yield current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score every paid hand in PokerGame log files")
+    parser.add_argument('paths', nargs='*', default=['.'],
+                        help="log files, glob patterns or directories of poker_game_*.log (default: .)")
+    parser.add_argument('--workers', type=int, default=0, help="worker processes (0 = all cores)")
+    parser.add_argument('--variant', choices=list(VARIANT_DEFINITIONS), default=DEFAULT_VARIANT,
+                        help="game of logs that do not name one")
+    parser.add_argument('--segment-mb', type=int, default=64, help="split files into pieces of this size")
+    parser.add_argument('--max-report', type=int, default=1000, help="mismatches to list per file")
+    args = parser.parse_args()
+
+    files = log_files(args.paths)
+    if not files:
+        parser.error("no log files found")
+    start = time.perf_counter()
+    total_bytes = total_hands = total_mismatches = 0
+    for result in audit(files, args.workers, args.variant, args.segment_mb << 20, args.max_report):
+        for mismatch in result['report']:
+            print(f"{mismatch.path}:{mismatch.line}: {mismatch.message}")
+        if result['mismatches'] > len(result['report']):
+            print(f"{result['path']}: {result['mismatches'] - len(result['report'])} more mismatches not listed")
+        total_bytes += result['size']
+        total_hands += result['hands']
+        total_mismatches += result['mismatches']
+    elapsed = time.perf_counter() - start
+    print(f"{len(files)} files, {total_bytes / 1e6:,.1f} MB, {total_hands:,} hands: "
+          f"{total_mismatches:,} mismatches ({elapsed:.2f}s, {total_bytes / 1e6 / elapsed:,.0f} MB/s)",
+          file=sys.stderr)
+    sys.exit(1 if total_mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
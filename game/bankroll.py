@@ -0,0 +1,244 @@
+import sys
+import time
+import argparse
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+from .variants import DEFAULT_VARIANT, VARIANT_DEFINITIONS, get_variant
+
+DEFAULT_PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+
+
+@lru_cache(maxsize=None)
+def _optimal_distribution(variant_name: str, payouts: Tuple[int, ...]) -> Tuple[Tuple[int, float], ...]:
+    from .rtp import analyze
+    result = analyze(variant_name, payouts)
+    distribution = {}
+    for name, payout in zip(get_variant(variant_name).hand_names, payouts):
+        distribution[payout] = distribution.get(payout, 0.0) + float(result['probabilities_exact'][name])
+    return tuple(sorted(distribution.items()))
+
+
+def payout_distribution(variant=None, payouts: Optional[Sequence[int]] = None) -> Dict[int, float]:
+    """Exact probability of every payout multiplier of one hand under optimal play.
+
+    Computed once per paytable with game.rtp.analyze (a few seconds) and kept
+    for the life of the process.
+    """
+    variant = get_variant(variant)
+    return dict(_optimal_distribution(variant.name, tuple(payouts or variant.payouts)))
+
+
+def _steps(distribution: Dict[int, float]):
+    # Change of the bankroll per hand in bets (payout multiplier - 1), merged and normalised
+    total = sum(distribution.values())
+    steps = {}
+    for multiplier, probability in distribution.items():
+        if probability > 0:
+            steps[multiplier - 1] = steps.get(multiplier - 1, 0.0) + probability / total
+    if min(steps) < -1:
+        raise ValueError("payout multipliers must not be negative")
+    return sorted(steps.items())
+
+
+def _forward(steps, hands: int, start: int, top: int):
+    """Bankroll distribution after every hand, in bets above the last affordable bet.
+
+    State 0 (cannot cover a bet) absorbs. A hand loses at most one bet, so a
+    bankroll of top >= start + hands can never go broke in the hands left; all
+    mass at or above it is kept in the absorbing state top without changing the
+    ruin probabilities. That mass would end at least top - hands + 1, so the
+    final distribution is exact up to top - hands.
+    """
+    v = np.zeros(top + 1)
+    v[start] = 1.0
+    ruin = np.empty(hands)
+    max_gain = steps[-1][0]
+    hi = start  # Highest state that can hold probability so far
+    for t in range(hands):
+        new_hi = min(top, hi + max(max_gain, 0))
+        new = np.zeros(top + 1)
+        new[0] = v[0]
+        new[top] += v[top]
+        alive = v[1:min(hi, top - 1) + 1]  # States 1 .. min(hi, top - 1)
+        n = len(alive)
+        for change, p in steps:
+            lo = 1 + change
+            end = lo + n
+            if end <= top:
+                new[lo:end] += p * alive
+            else:
+                kept = max(top - lo, 0)
+                new[lo:top] += p * alive[:kept]
+                new[top] += p * alive[kept:].sum()
+        v = new
+        hi = new_hi
+        ruin[t] = v[0]
+    return v, ruin
+
+
+def _ruin_from_every_start(steps, hands: int, size: int) -> np.ndarray:
+    """Probability of going broke within hands from every state 0 .. size - 1"""
+    # r[u] is 0 for u > hands: a hand loses at most one bet
+    length = max(size, hands + 1) + 1
+    r = np.zeros(length)
+    r[0] = 1.0
+    for t in range(1, hands + 1):
+        new = np.zeros(length)
+        new[0] = 1.0
+        hi = min(t, length - 1)  # r_t[u] can only be non-zero for u <= t
+        for change, p in steps:
+            lo = 1 + change
+            end = min(hi + change, length - 1)
+            if end >= lo:
+                new[1:end - change + 1] += p * r[lo:end + 1]
+        r = new
+    return r[:size]
+
+
+def ruin_by_bankroll(hands: int, bankrolls: int, distribution: Optional[Dict[int, float]] = None,
+                     variant=None) -> np.ndarray:
+    """Probability of going broke within hands, starting from 0 .. bankrolls - 1 bets.
+
+    A bankroll of b bets means credits // bet == b; 0 cannot cover the bet. The
+    distribution of payout multipliers defaults to optimal play of the variant.
+    """
+    if distribution is None:
+        distribution = payout_distribution(variant)
+    return _ruin_from_every_start(_steps(distribution), hands, bankrolls)
+
+
+def _expected_high(steps, hands: int, start: int, top: int) -> float:
+    """Expected running maximum, by propagating the joint (maximum, bankroll) distribution.
+
+    Quadratic in the number of bankroll states per hand, so it is only worth
+    running for short sessions or small bankrolls.
+    """
+    rows = top - start + 1
+    joint = np.zeros((rows, top + 1))  # [maximum - start, bankroll]
+    joint[0, start] = 1.0
+    columns = np.arange(top + 1)
+    above_max = columns[None, :] > (start + np.arange(rows))[:, None]
+    max_gain = max(steps[-1][0], 0)
+    hi = start
+    for _ in range(hands):
+        hi = min(top, hi + max_gain)
+        r, c = hi - start + 1, hi + 1
+        block = joint[:r, :c]
+        new = np.zeros_like(block)
+        new[:, 0] = block[:, 0]
+        new[:, top:c] += block[:, top:c]
+        alive = block[:, 1:min(c, top)]
+        n = alive.shape[1]
+        for change, p in steps:
+            lo = 1 + change
+            end = min(lo + n, c)
+            if end > lo:
+                new[:, lo:end] += p * alive[:, :end - lo]
+            if lo + n > c:
+                new[:, c - 1] += p * alive[:, end - lo:].sum(axis=1)
+        # A bankroll above its row's maximum sets a new maximum
+        mask = above_max[:r, :c]
+        raised = np.where(mask, new, 0.0).sum(axis=0)
+        new[mask] = 0.0
+        targets = np.arange(start + 1, c)
+        new[targets - start, targets] += raised[start + 1:]
+        joint[:r, :c] = new
+    return float(joint.sum(axis=1) @ (start + np.arange(rows)))
+
+
+def analyze_bankroll(hands: int, starting_credits: int = 100, bet: int = 5,
+                     distribution: Optional[Dict[int, float]] = None, variant=None,
+                     percentiles: Sequence[float] = DEFAULT_PERCENTILES, session_high: bool = False) -> Dict:
+    """Exact risk of ruin and bankroll distribution of a session of flat bets.
+
+    distribution maps payout multipliers to their probability per hand and
+    defaults to optimal play of the variant. Play stops, as in
+    test_endurance.play_session, once the credits cannot cover the bet. The
+    bankroll distribution is propagated hand by hand, so the results are exact
+    (up to floating point) rather than sampled, except that the final credits
+    are truncated: sessions ending with more than one big win above
+    overflow_credits are reported only as overflow_probability, and
+    percentiles that fall among them read overflow_credits ("at least").
+    session_high adds the expected session high, which needs a much slower
+    joint distribution and counts highs above the grid at its top.
+    """
+    start_time = time.perf_counter()
+    if hands < 0 or bet < 1 or starting_credits < 0:
+        raise ValueError("hands and starting_credits must not be negative, and bet must be positive")
+    if distribution is None:
+        distribution = payout_distribution(variant)
+    steps = _steps(distribution)
+    # Every payout is a multiple of the bet, so credits = remainder + bet * state
+    start, remainder = divmod(starting_credits, bet)
+    # Final credits are exact below edge: room for the biggest single win on top
+    # of the most a session can win in small steps (see _forward)
+    top = start + 2 * hands + max(steps[-1][0], 0)
+    edge = top - hands + 1
+
+    final, ruin_by_hand = _forward(steps, hands, start, top)
+    ruin_from = _ruin_from_every_start(steps, hands, start + 1)
+    credits = remainder + bet * np.arange(top + 1)
+
+    # Hand t is played when the bankroll survived t - 1 hands
+    survival = np.concatenate(([1.0 if start else 0.0], 1 - ruin_by_hand[:-1]))[:hands] if hands else np.zeros(0)
+    mean_step = sum(change * p for change, p in steps)
+    expected_hands = float(survival.sum())
+    # Losses are one bet at a time, so the session low reaches state k exactly when
+    # going broke from start - k would: P(low <= k) = ruin_from[start - k]
+    low_states = np.arange(start + 1)
+    p_low_at_most = np.where(low_states < start, ruin_from[start - low_states], 1.0)
+
+    cdf = np.cumsum(final)
+    result = {
+        'hands': hands,
+        'starting_credits': starting_credits,
+        'bet': bet,
+        'ruin_probability': float(ruin_by_hand[-1]) if hands else float(start == 0),
+        'ruin_by_hand': ruin_by_hand,
+        'expected_hands_played': expected_hands,
+        'expected_final_credits': starting_credits + bet * mean_step * expected_hands,
+        'final_credits': {int(c): float(p) for c, p in zip(credits[:edge], final[:edge]) if p > 0},
+        'percentiles': {q: int(credits[min(np.searchsorted(cdf, q / 100 - 1e-12), edge, top)])
+                        for q in percentiles},
+        'expected_low': float(remainder + bet * (start - p_low_at_most[:-1].sum())),
+        'low_distribution': {int(remainder + bet * k): float(p) for k, p in
+                             zip(low_states, np.diff(p_low_at_most, prepend=0.0)) if p > 0},
+        # Sessions ending at overflow_credits or more, not broken down further
+        'overflow_credits': int(remainder + bet * edge),
+        'overflow_probability': float(final[edge:].sum()),
+    }
+    if session_high:
+        result['expected_high'] = remainder + bet * _expected_high(steps, hands, start, top)
+    result['seconds'] = time.perf_counter() - start_time
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exact risk of ruin and final bankroll distribution of a session")
+    parser.add_argument('--hands', type=int, default=1000, help="hands in the session (default: 1000)")
+    parser.add_argument('--credits', type=int, default=100, help="starting credits (default: 100)")
+    parser.add_argument('--bet', type=int, default=5, help="credits bet per hand (default: 5)")
+    parser.add_argument('--variant', choices=list(VARIANT_DEFINITIONS), default=DEFAULT_VARIANT)
+    parser.add_argument('--high', action='store_true', help="also compute the expected session high (slow)")
+    args = parser.parse_args(argv)
+
+    distribution = payout_distribution(args.variant)
+    result = analyze_bankroll(args.hands, args.credits, args.bet, distribution, session_high=args.high)
+    print(f"{get_variant(args.variant).title}, {args.credits} credits, bet {args.bet}, {args.hands} hands "
+          f"({result['seconds']:.2f}s):")
+    print(f"  Risk of ruin:          {result['ruin_probability']:.6%}")
+    print(f"  Expected hands played: {result['expected_hands_played']:.1f}")
+    print(f"  Expected final:        {result['expected_final_credits']:.2f} credits")
+    print(f"  Expected session low:  {result['expected_low']:.2f} credits")
+    if args.high:
+        print(f"  Expected session high: {result['expected_high']:.2f} credits")
+    overflow = result['overflow_credits']
+    print("  Final credits percentiles: " +
+          ", ".join(f"{q}%: {'>=' if value >= overflow else ''}{value}" for q, value in result['percentiles'].items()))
+    if result['overflow_probability'] > 0:
+        print(f"  Final credits >= {overflow}: {result['overflow_probability']:.6%}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import time
+import numpy as np
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+from .logger import game_logger
+from .evaluator import CARD_PRIME
+from .variants import Variant, get_variant
+from .strategy_table import COLEX, StrategyTable, get_default_table
+
+_CARD_PRIME = np.array(CARD_PRIME, dtype=np.int64)
+_COLEX = np.array(COLEX, dtype=np.int64)
+
+
+@lru_cache(maxsize=None)
+def _variant_arrays(variant: Variant):
+    """A variant's lookup table as arrays: sorted hand keys, the category of each key,
+    per-card suit bits and payouts"""
+    table = variant.category_table
+    keys = sorted(table)
+    return (np.array(keys, dtype=np.int64),
+            np.array([table[key] for key in keys], dtype=np.int8),
+            np.array(variant.suit_bits, dtype=np.int8),
+            np.array(variant.payouts, dtype=np.int64))
+
+
+def deal(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Deal n independent hands as an (n, 10) array of card codes.
+
+    Each row is a uniformly random ordering of 10 distinct cards, from an argsort
+    of random keys: columns 0-4 are the dealt hand, column 5 + i replaces card i.
+    """
+    return np.argsort(rng.random((n, 52)), axis=1)[:, :10].astype(np.int8)
+
+
+def evaluate_many(hands: np.ndarray, variant=None) -> np.ndarray:
+    """Hand category of every row of an (n, 5) array of card codes"""
+    table_keys, table_categories, suit_bits, _ = _variant_arrays(get_variant(variant))
+    hands = hands.astype(np.intp)
+    keys = _CARD_PRIME[hands].prod(axis=1) << 1
+    flush = np.bitwise_and.reduce(suit_bits[hands], axis=1) != 0
+    keys |= flush
+    return table_categories[np.searchsorted(table_keys, keys)]
+
+
+def canonicalize_many(hands: np.ndarray):
+    """Vectorized strategy_table.canonicalize for an (n, 5) array of card codes.
+
+    Returns the class indices, the original position of each card in canonical
+    sorted order, and the canonical hands themselves (sorted card codes).
+    """
+    hands = hands.astype(np.int64)
+    ranks = hands >> 2
+    suits = hands & 3
+    suit_masks = np.stack([((suits == suit) << ranks).sum(axis=1) for suit in range(4)], axis=1)
+    suit_order = np.argsort(-suit_masks, axis=1, kind='stable')
+    labels = np.argsort(suit_order, axis=1)
+    canonical = (hands & ~3) | np.take_along_axis(labels, suits, axis=1)
+    order = np.argsort(canonical, axis=1)
+    canonical = np.take_along_axis(canonical, order, axis=1)
+    index = _COLEX[np.arange(5), canonical].sum(axis=1)
+    return index, order, canonical
+
+
+def table_strategy(table: StrategyTable) -> Callable[[np.ndarray], np.ndarray]:
+    """Vectorized optimal strategy: looks up the hold masks of many hands in a strategy table"""
+    keys = np.frombuffer(table.keys, dtype=np.uint32)
+    masks = np.frombuffer(table.masks, dtype=np.uint8)
+
+    def strategy(hands: np.ndarray) -> np.ndarray:
+        index, order, _ = canonicalize_many(hands)
+        canonical_masks = masks[np.searchsorted(keys, index)].astype(np.int64)
+        held = (canonical_masks[:, None] >> np.arange(5)) & 1
+        return (held << order).sum(axis=1)
+
+    return strategy
+
+
+def simulate_batch(num_hands: int, strategy: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                   bet: int = 5, rng: Optional[np.random.Generator] = None,
+                   chunk_size: int = 100000, keep_payouts: bool = False, variant=None) -> Dict:
+    """Play num_hands independent hands of a variant with array operations.
+
+    strategy maps an (n, 5) array of dealt card codes to n hold masks (bit i
+    holds card i) and defaults to the variant's precomputed optimal strategy
+    table. Returns hand-type counts, total bet and total won; with
+    keep_payouts the per-hand payouts and final hand categories are included
+    too, in play order.
+    """
+    variant = get_variant(variant)
+    if strategy is None:
+        table = get_default_table(variant)
+        if table is None:
+            raise FileNotFoundError(f"No strategy table found, run: python -m game.strategy_table build "
+                                    f"--variant {variant.name}")
+        strategy = table_strategy(table)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    pay = _variant_arrays(variant)[3]
+    counts = np.zeros(len(variant.hand_names), dtype=np.int64)
+    total_won = 0
+    payouts = [] if keep_payouts else None
+    final_categories = [] if keep_payouts else None
+    start = time.perf_counter()
+    remaining = num_hands
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        cards = deal(rng, n)
+        dealt = cards[:, :5]
+        held = ((strategy(dealt)[:, None] >> np.arange(5)) & 1).astype(bool)
+        categories = evaluate_many(np.where(held, dealt, cards[:, 5:]), variant)
+
+        counts += np.bincount(categories, minlength=len(counts))
+        won = pay[categories] * bet
+        total_won += int(won.sum())
+        if keep_payouts:
+            payouts.append(won)
+            final_categories.append(categories)
+        remaining -= n
+
+    elapsed = time.perf_counter() - start
+    game_logger.summary("Batch simulated %d hands in %.2fs (%.0f hands/sec)",
+                        num_hands, elapsed, num_hands / elapsed if elapsed > 0 else 0)
+    result = {
+        'hands': num_hands,
+        'total_bet': num_hands * bet,
+        'total_won': total_won,
+        'hand_types': {variant.hand_names[category]: int(count) for category, count in enumerate(counts)},
+    }
+    if keep_payouts:
+        result['payouts'] = np.concatenate(payouts) if payouts else np.zeros(0, dtype=np.int64)
+        result['categories'] = np.concatenate(final_categories) if final_categories else np.zeros(0, dtype=np.int8)
+    return result
+
+
+if __name__ == "__main__":
+    result = simulate_batch(1000000)
+    print(f"Return rate: {result['total_won'] / result['total_bet'] * 100:.2f}%")
+    for hand_type, count in result['hand_types'].items():
+        print(f"{hand_type}: {count}")
@@ -0,0 +1,85 @@
+import os
+import json
+import time
+import signal
+from contextlib import contextmanager
+from typing import Dict, Optional
+from .logger import game_logger
+
+VERSION = 1
+
+
+class Checkpoint:
+    """Periodic, atomic snapshots of a long simulation, so it can resume after a crash or Ctrl-C.
+
+    The simulation loop compares its hand count with next_check once per hand;
+    only every check_hands hands does due() look at the clock, and a snapshot
+    is written once interval seconds have passed. A snapshot is JSON written
+    to a temporary file, fsynced and renamed over the previous one, so the
+    file on disk is always a complete snapshot taken between two hands.
+    """
+
+    def __init__(self, path: str, interval: float = 60.0, check_hands: int = 1000):
+        self.path = path
+        self.interval = interval
+        self.check_hands = check_hands
+        self.next_check = check_hands
+        self.deadline = time.monotonic() + interval
+        self.interrupted = False  # Set by Ctrl-C under catching_interrupts()
+        self.saves = 0
+
+    def due(self, hands_played: int) -> bool:
+        """Called once hands_played reaches next_check: should a snapshot be written now?"""
+        self.next_check = hands_played + self.check_hands
+        return self.interrupted or time.monotonic() >= self.deadline
+
+    def save(self, state: Dict):
+        """Atomically replace the checkpoint file with state (JSON-compatible values)"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(dict(state, version=VERSION, saved=time.time()), f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self.deadline = time.monotonic() + self.interval
+        self.saves += 1
+        game_logger.info("Checkpoint %d saved to %s at hand %d", self.saves, self.path, state['hands_played'])
+
+    def load(self) -> Optional[Dict]:
+        """The last snapshot, or None if none has been written yet"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            state = json.load(f)
+        if state.get('version') != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} checkpoint")
+        return state
+
+    @contextmanager
+    def catching_interrupts(self):
+        """Turn Ctrl-C into a final snapshot at the next hand boundary; a second Ctrl-C stops at once.
+
+        Signal handlers can only be installed from the main thread.
+        """
+        def handler(signum, frame):
+            if self.interrupted:
+                raise KeyboardInterrupt
+            self.interrupted = True
+            self.next_check = 0
+
+        previous = signal.signal(signal.SIGINT, handler)
+        try:
+            yield self
+        finally:
+            signal.signal(signal.SIGINT, previous)
+
+
+def rng_state(rng) -> list:
+    """random.Random state as JSON-compatible lists"""
+    version, internal, gauss_next = rng.getstate()
+    return [version, list(internal), gauss_next]
+
+
+def set_rng_state(rng, state: list):
+    version, internal, gauss_next = state
+    rng.setstate((version, tuple(internal), gauss_next))
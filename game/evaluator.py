@@ -0,0 +1,174 @@
+import itertools
+from typing import Dict, List, Sequence, Tuple
+from collections import Counter
+from functools import lru_cache
+
+# Card encoding: every card is a small integer code = rank_index * 4 + suit_index,
+# so rank = code >> 2 and suit = code & 3. Ranks and suits use the same order as
+# PokerGame.RANKS / PokerGame.SUITS.
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+SUITS = ['♠', '♥', '♦', '♣']
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+# Hand categories, in increasing order of strength
+NO_WIN = 0
+JACKS_OR_BETTER = 1
+TWO_PAIR = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+ROYAL_FLUSH = 9
+
+HAND_NAMES = [
+    "No Win",
+    "Jacks or Better",
+    "Two Pair",
+    "Three of a Kind",
+    "Straight",
+    "Flush",
+    "Full House",
+    "Four of a Kind",
+    "Straight Flush",
+    "Royal Flush",
+]
+
+# Payout multipliers (times the bet) indexed by hand category
+PAYOUTS = [0, 1, 2, 3, 4, 6, 9, 25, 50, 800]
+
+# One prime per rank: the product of five card primes identifies the rank
+# multiset uniquely, which gives a perfect hash key for the lookup table.
+RANK_PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+
+# Per-card lookup tables indexed by card code
+CARD_PRIME = [RANK_PRIMES[code >> 2] for code in range(52)]
+CARD_SUIT_BIT = [1 << (code & 3) for code in range(52)]
+
+
+def card_code(suit: str, rank: str) -> int:
+    """Encode a card given its suit and rank symbols"""
+    return RANK_INDEX[rank] * 4 + SUIT_INDEX[suit]
+
+
+def code_to_str(code: int) -> str:
+    return f"{RANKS[code >> 2]}{SUITS[code & 3]}"
+
+
+def hand_key(codes: Sequence[int]) -> int:
+    """Lookup key of a 5-card hand: rank prime product shifted left, plus a flush bit"""
+    a, b, c, d, e = codes
+    key = (CARD_PRIME[a] * CARD_PRIME[b] * CARD_PRIME[c] * CARD_PRIME[d] * CARD_PRIME[e]) << 1
+    if CARD_SUIT_BIT[a] & CARD_SUIT_BIT[b] & CARD_SUIT_BIT[c] & CARD_SUIT_BIT[d] & CARD_SUIT_BIT[e]:
+        key |= 1
+    return key
+
+
+def classify_reference(ranks: List[int], suits: List[int]) -> int:
+    """Straightforward hand classification, kept as the reference for the lookup tables"""
+    ranks = sorted(ranks)
+    is_flush = len(set(suits)) == 1
+
+    is_straight = False
+    if len(set(ranks)) == 5:
+        # Ace-low straight (A,2,3,4,5) or a regular run (including Ace-high)
+        if ranks == [0, 1, 2, 3, 12] or ranks == list(range(ranks[0], ranks[0] + 5)):
+            is_straight = True
+
+    rank_counts = Counter(ranks)
+    counts = sorted(rank_counts.values())
+
+    if is_straight and is_flush:
+        return ROYAL_FLUSH if ranks == [8, 9, 10, 11, 12] else STRAIGHT_FLUSH
+    if counts[-1] == 4:
+        return FOUR_OF_A_KIND
+    if counts == [2, 3]:
+        return FULL_HOUSE
+    if is_flush:
+        return FLUSH
+    if is_straight:
+        return STRAIGHT
+    if counts[-1] == 3:
+        return THREE_OF_A_KIND
+    if counts.count(2) == 2:
+        return TWO_PAIR
+    if counts[-1] == 2:
+        pair_rank = max(rank_counts.items(), key=lambda x: (x[1], x[0]))[0]
+        if pair_rank >= RANK_INDEX['J']:
+            return JACKS_OR_BETTER
+    return NO_WIN
+
+
+def rank_multisets(size: int) -> List[Tuple[int, ...]]:
+    """All sorted rank tuples of the given size with at most four cards per rank"""
+    return [ranks for ranks in itertools.combinations_with_replacement(range(13), size)
+            if max(Counter(ranks).values(), default=0) <= 4]
+
+
+def _build_category_table() -> Dict[int, int]:
+    # Classify every 5-card rank multiset once, with and without a flush
+    table = {}
+    for ranks in rank_multisets(5):
+        product = 1
+        for rank in ranks:
+            product *= RANK_PRIMES[rank]
+        table[product << 1] = classify_reference(list(ranks), [0, 1, 0, 0, 0])
+        if len(set(ranks)) == 5:
+            table[(product << 1) | 1] = classify_reference(list(ranks), [0] * 5)
+    return table
+
+
+@lru_cache(maxsize=None)
+def category_table() -> Dict[int, int]:
+    """Hand key -> hand category, built on first use rather than at import"""
+    return _build_category_table()
+
+
+@lru_cache(maxsize=None)
+def payout_table() -> Dict[int, int]:
+    """Hand key -> payout multiplier"""
+    return {key: PAYOUTS[category] for key, category in category_table().items()}
+
+
+def __getattr__(name):
+    # CATEGORY_TABLE and PAYOUT_TABLE stay available as module attributes, built lazily
+    if name == 'CATEGORY_TABLE':
+        return category_table()
+    if name == 'PAYOUT_TABLE':
+        return payout_table()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def evaluate(codes: Sequence[int]) -> int:
+    """Classify a 5-card hand given as card codes; returns a hand category"""
+    return category_table()[hand_key(codes)]
+
+
+def evaluate_cards(cards) -> int:
+    """Classify a 5-card hand given as Card objects"""
+    return category_table()[hand_key([card.code for card in cards])]
+
+
+def verify_exhaustive() -> int:
+    """Check the lookup tables against the reference classifier on all 2,598,960 hands.
+
+    Returns the number of hands checked and raises AssertionError on the first mismatch.
+    """
+    checked = 0
+    for codes in itertools.combinations(range(52), 5):
+        expected = classify_reference([code >> 2 for code in codes], [code & 3 for code in codes])
+        actual = evaluate(codes)
+        if actual != expected:
+            hand = [code_to_str(code) for code in codes]
+            raise AssertionError(f"{hand}: table gives {HAND_NAMES[actual]}, expected {HAND_NAMES[expected]}")
+        checked += 1
+    return checked
+
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    total = verify_exhaustive()
+    print(f"Verified {total} hands in {time.perf_counter() - start:.1f}s")
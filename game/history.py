@@ -0,0 +1,115 @@
+import os
+import mmap
+import struct
+from collections import namedtuple
+from typing import Iterator, Sequence
+
+# File layout: a 16-byte header followed by fixed-width 16-byte records.
+# Each record packs, little-endian:
+#   uint64  dealt cards (5 x 6 bits) | final cards (5 x 6 bits) << 30
+#   uint32  hold mask (5 bits) | bet (3 bits) << 5 | payout (16 bits) << 8
+#   int32   credits after the hand
+MAGIC = b'JOBH'
+VERSION = 1
+HEADER = struct.Struct('<4sHH8x')  # magic, version, record size
+RECORD = struct.Struct('<QIi')
+
+HandRecord = namedtuple('HandRecord', ['dealt', 'hold_mask', 'final', 'bet', 'payout', 'credits'])
+
+
+def pack_cards(codes: Sequence[int]) -> int:
+    a, b, c, d, e = codes
+    return a | b << 6 | c << 12 | d << 18 | e << 24
+
+
+def unpack_cards(packed: int) -> tuple:
+    return (packed & 63, packed >> 6 & 63, packed >> 12 & 63, packed >> 18 & 63, packed >> 24 & 63)
+
+
+class HandHistoryWriter:
+    """Appends hand records to a binary history file through an in-memory buffer"""
+
+    def __init__(self, path: str, buffer_records: int = 4096):
+        self.path = path
+        self.buffer = bytearray()
+        self.buffer_bytes = buffer_records * RECORD.size
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'ab')
+        if new_file:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        else:
+            _check_header(path)
+
+    def record(self, dealt: Sequence[int], hold_mask: int, final: Sequence[int], bet: int,
+               payout: int, credits: int):
+        """Add one hand; cards are evaluator card codes"""
+        self.buffer += RECORD.pack(pack_cards(dealt) | pack_cards(final) << 30,
+                                   hold_mask | bet << 5 | payout << 8, credits)
+        if len(self.buffer) >= self.buffer_bytes:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def tell(self) -> int:
+        """Flush and return the file size, a point truncate() can roll back to"""
+        self.flush()
+        return self.file.tell()
+
+    def truncate(self, size: int):
+        """Drop the records written after tell() returned size (e.g. when resuming a run)"""
+        self.buffer.clear()
+        self.file.truncate(size)
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(path: str):
+    with open(path, 'rb') as f:
+        magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} hand history file")
+
+
+def iter_raw(path: str, chunk_records: int = 65536) -> Iterator[tuple]:
+    """Stream the raw (cards, info, credits) integer triples of a history file.
+
+    The file is memory-mapped and decoded a chunk at a time, so memory use does
+    not grow with the file size.
+    """
+    _check_header(path)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= HEADER.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = HEADER.size + (len(mm) - HEADER.size) // RECORD.size * RECORD.size
+            chunk_bytes = chunk_records * RECORD.size
+            for start in range(HEADER.size, end, chunk_bytes):
+                yield from RECORD.iter_unpack(mm[start:min(start + chunk_bytes, end)])
+
+
+def read_history(path: str, chunk_records: int = 65536) -> Iterator[HandRecord]:
+    """Stream the hands of a history file as HandRecord tuples"""
+    for cards, info, credits in iter_raw(path, chunk_records):
+        yield HandRecord(unpack_cards(cards & 0x3FFFFFFF), info & 31, unpack_cards(cards >> 30),
+                         info >> 5 & 7, info >> 8, credits)
+
+
+def history_array(path: str):
+    """Memory-map a history file as a numpy structured array for vectorized analysis"""
+    import numpy as np
+    _check_header(path)
+    dtype = np.dtype([('cards', '<u8'), ('info', '<u4'), ('credits', '<i4')])
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+    return np.memmap(path, dtype=dtype, mode='r', offset=HEADER.size, shape=(count,))
@@ -1,42 +1,135 @@
-import logging
+import os
 import sys
-from datetime import datetime
+import atexit
+import logging
+
+def _merge_args(record):
+    """Handler filter: format the message once instead of once per handler"""
+    if record.args:
+        record.msg = record.getMessage()
+        record.args = None
+    return True
 
 class PokerLogger:
-    def __init__(self):
+    """Game logger with three profiles:
+
+    debug       -- everything at DEBUG, written synchronously (the original behaviour)
+    performance -- INFO and up, formatted and written by a background thread
+    simulation  -- per-session summaries only, written by a background thread
+    """
+    PROFILES = ('debug', 'performance', 'simulation')
+
+    def __init__(self, profile=None):
         self.logger = logging.getLogger('poker_game')
-        self.logger.setLevel(logging.DEBUG)
-        
+        # Session summaries go through a child logger so they survive the simulation profile
+        self.summary_logger = logging.getLogger('poker_game.summary')
+        self.listener = None
+        self.profile = None
+        self.configure(profile or os.environ.get('POKER_LOG_PROFILE', 'debug'))
+        atexit.register(self.stop)
+
+    def configure(self, profile):
+        """Switch to one of PROFILES.
+
+        Importing the game stays free of I/O: the log file is opened and the
+        writer thread started only when the first record is logged.
+        """
+        if profile not in self.PROFILES:
+            raise ValueError(f"Unknown logging profile: {profile}")
+        self.stop()
+        self._remove_handlers()
+        if profile == 'debug':
+            self.logger.setLevel(logging.DEBUG)
+        else:
+            self.logger.setLevel(logging.INFO if profile == 'performance' else logging.WARNING)
+        self.summary_logger.setLevel(logging.INFO)
+        self.profile = profile
+        self._install()
+
+    def _remove_handlers(self):
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+
+    def _install(self):
+        """Create the console and file handlers of the current profile"""
+        import queue
+        import logging.handlers
+        from datetime import datetime
+
         # Create console handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.DEBUG)
-        
+
         # Create file handler
-        file_handler = logging.FileHandler(f'poker_game_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
+        file_handler = logging.FileHandler(f'poker_game_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log', delay=True)
         file_handler.setLevel(logging.DEBUG)
-        
+
         # Create formatters and add them to the handlers
         console_format = logging.Formatter('%(message)s')
         file_format = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        
+
         console_handler.setFormatter(console_format)
         file_handler.setFormatter(file_format)
-        
-        # Add the handlers to the logger
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
-    
-    def debug(self, message):
-        self.logger.debug(f"DEBUG: {message}")
-    
-    def info(self, message):
-        self.logger.info(f"INFO: {message}")
-    
-    def warning(self, message):
-        self.logger.warning(f"WARNING: {message}")
-    
-    def error(self, message):
-        self.logger.error(f"ERROR: {message}")
+        console_handler.addFilter(_merge_args)
+        file_handler.addFilter(_merge_args)
+
+        if self.profile == 'debug':
+            # Add the handlers to the logger
+            self.logger.addHandler(console_handler)
+            self.logger.addHandler(file_handler)
+        else:
+            owner = self
+
+            class DeferredQueueHandler(logging.handlers.QueueHandler):
+                """Queue handler that leaves all formatting to the listener thread"""
+
+                def prepare(self, record):
+                    # The stock handler formats the message here, in the caller's thread
+                    return record
+
+                def enqueue(self, record):
+                    # Called with the handler lock held, so the thread is started once
+                    if owner.listener is None:
+                        owner.listener = logging.handlers.QueueListener(self.queue, console_handler, file_handler,
+                                                                        respect_handler_level=True)
+                        owner.listener.start()
+                    super().enqueue(record)
+
+            self.logger.addHandler(DeferredQueueHandler(queue.SimpleQueue()))
+
+    def stop(self):
+        """Flush and stop the background writer thread, if any, and close its log file"""
+        if self.listener is not None:
+            self.listener.stop()
+            # The console and file handlers belong to the listener alone
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+
+    def is_enabled(self, level):
+        """Check before building expensive log arguments"""
+        return self.logger.isEnabledFor(level)
+
+    def debug(self, message, *args):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("DEBUG: " + message, *args)
+
+    def info(self, message, *args):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("INFO: " + message, *args)
+
+    def warning(self, message, *args):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning("WARNING: " + message, *args)
+
+    def error(self, message, *args):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error("ERROR: " + message, *args)
+
+    def summary(self, message, *args):
+        """Per-session summary lines, kept by every profile"""
+        self.summary_logger.info("INFO: " + message, *args)
 
 # Global logger instance
 game_logger = PokerLogger()
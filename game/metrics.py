@@ -0,0 +1,218 @@
+import os
+import sys
+import time
+import atexit
+import pstats
+import cProfile
+import threading
+import functools
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from typing import Dict, List, Optional, Sequence
+from .logger import game_logger
+
+# Histogram bucket upper bounds in seconds, from 1 microsecond to 1 second
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+           1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+_BUCKETS_NS = [int(bound * 1e9) for bound in BUCKETS]
+
+# Methods timed by enable(): PokerGame phases, and GameWindow.draw when the UI is loaded
+GAME_PHASES = ('initialize_deck', 'deal_initial_hand', 'draw_new_cards', 'evaluate_hand', 'collect_winnings')
+
+
+class Histogram:
+    """Call count, total time and per-bucket counts of one timed phase"""
+    __slots__ = ('counts', 'sum_ns', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last bucket is +Inf
+        self.sum_ns = 0
+        self.count = 0
+
+    def observe_ns(self, elapsed_ns: int):
+        self.counts[bisect_left(_BUCKETS_NS, elapsed_ns)] += 1
+        self.sum_ns += elapsed_ns
+        self.count += 1
+
+
+def _timed(function, histogram: Histogram):
+    perf_counter_ns = time.perf_counter_ns
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.observe_ns(perf_counter_ns() - start)
+    return timed
+
+
+class Metrics:
+    """Per-phase timers: a latency histogram and call count for every instrumented method.
+
+    Nothing is timed until enable() wraps the instrumented methods; until then
+    (and after disable()) the game runs its original, unwrapped methods, so
+    instrumentation costs nothing when it is off. Times are inclusive:
+    deal_initial_hand includes the initialize_deck call it makes.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self._wrapped = []  # (class, method name, original function)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._wrapped)
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time a block of code as phase name"""
+        histogram = self.histogram(name)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            histogram.observe_ns(time.perf_counter_ns() - start)
+
+    def instrument(self, cls, names: Sequence[str], prefix: Optional[str] = None):
+        """Replace methods of cls with timed wrappers; phases are named prefix.method"""
+        prefix = prefix or cls.__name__
+        for name in names:
+            original = cls.__dict__[name]
+            setattr(cls, name, _timed(original, self.histogram(f"{prefix}.{name}")))
+            self._wrapped.append((cls, name, original))
+
+    def enable(self):
+        """Time the PokerGame phases, and GameWindow.draw if the UI has been imported"""
+        if self.enabled:
+            return
+        from .poker_game import PokerGame
+        self.instrument(PokerGame, GAME_PHASES)
+        game_window = sys.modules.get('ui.game_window')
+        if game_window is not None:
+            self.instrument(game_window.GameWindow, ['draw'])
+        game_logger.info("Instrumentation enabled for %d methods", len(self._wrapped))
+
+    def disable(self):
+        """Put the original methods back; recorded metrics are kept"""
+        for cls, name, original in reversed(self._wrapped):
+            setattr(cls, name, original)
+        self._wrapped.clear()
+
+    def reset(self):
+        self.histograms.clear()
+
+    def prometheus_text(self, namespace: str = 'poker') -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = [f"# HELP {namespace}_phase_seconds Time spent in each instrumented method",
+                 f"# TYPE {namespace}_phase_seconds histogram"]
+        for phase, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'{namespace}_phase_seconds_bucket{{phase="{phase}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{namespace}_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{namespace}_phase_seconds_sum{{phase="{phase}"}} {histogram.sum_ns / 1e9:.9f}')
+            lines.append(f'{namespace}_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write the metrics to a file atomically (e.g. for node_exporter's textfile collector)"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+
+    def export_to_file(self, path: str, interval: float = 10.0) -> threading.Thread:
+        """Rewrite the metrics file every interval seconds from a background thread, and at exit"""
+        def run():
+            while True:
+                time.sleep(interval)
+                self.write_prometheus(path)
+
+        thread = threading.Thread(target=run, name='metrics-file', daemon=True)
+        thread.start()
+        atexit.register(self.write_prometheus, path)
+        return thread
+
+    def serve(self, port: int, host: str = '127.0.0.1'):
+        """Serve the metrics over HTTP (any path, e.g. /metrics) from a background thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes are not game events
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        game_logger.summary("Serving metrics on http://%s:%d/metrics", host, server.server_address[1])
+        return server
+
+    def summary(self) -> List[str]:
+        """One line per phase: calls, mean and total time"""
+        return [f"{phase:>32}: {h.count:>10,} calls, {h.sum_ns / h.count / 1000 if h.count else 0:>9.2f} us mean, "
+                f"{h.sum_ns / 1e9:>8.3f} s total" for phase, h in sorted(self.histograms.items())]
+
+
+# Global registry, like game_logger
+metrics = Metrics()
+
+
+@contextmanager
+def profiled(path: Optional[str] = None, top: int = 25):
+    """Run the block under cProfile; save the stats to path and print the top entries to stderr"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats('cumulative').print_stats(top)
+
+
+def add_arguments(parser):
+    """Add the --metrics, --metrics-port and --profile flags to a command line"""
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="time the game phases and write Prometheus metrics to this file (every 10s and at exit)")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="time the game phases and serve Prometheus metrics on this local port")
+    parser.add_argument('--profile', nargs='?', const='', metavar='PATH',
+                        help="run under cProfile, print the top functions and save the stats to PATH if given")
+
+
+@contextmanager
+def instrumented(args):
+    """Apply the flags from add_arguments() around a run"""
+    with ExitStack() as stack:
+        if args.metrics or args.metrics_port is not None:
+            metrics.enable()
+            if args.metrics:
+                metrics.export_to_file(args.metrics)
+            if args.metrics_port is not None:
+                metrics.serve(args.metrics_port)
+        if args.profile is not None:
+            stack.enter_context(profiled(args.profile or None))
+        try:
+            yield
+        finally:
+            if metrics.enabled:
+                print("\n".join(metrics.summary()), file=sys.stderr)
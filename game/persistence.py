@@ -0,0 +1,193 @@
+import time
+import sqlite3
+from typing import Dict, List, Optional
+from .logger import game_logger
+from .history import pack_cards, unpack_cards
+from .variants import get_variant
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    variant TEXT NOT NULL,
+    starting_credits INTEGER NOT NULL,
+    credits INTEGER NOT NULL,
+    max_credits INTEGER NOT NULL,
+    min_credits INTEGER NOT NULL,
+    current_bet INTEGER NOT NULL,
+    initial_bet INTEGER NOT NULL,
+    game_state TEXT NOT NULL,
+    dealt INTEGER,              -- Dealt hand while a hand is in play (history.pack_cards)
+    hand INTEGER,               -- Current hand: the dealt cards while holding, the final ones after the draw
+    hold_mask INTEGER NOT NULL, -- Cards held so far, or at the draw
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hands (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    dealt INTEGER NOT NULL,
+    hold_mask INTEGER NOT NULL,
+    final INTEGER NOT NULL,
+    bet INTEGER NOT NULL,
+    payout INTEGER NOT NULL,
+    credits INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hands_session ON hands(session_id);
+"""
+
+_UPDATE_SESSION = """
+UPDATE sessions SET credits = ?, max_credits = ?, min_credits = ?, current_bet = ?, initial_bet = ?,
+    game_state = ?, dealt = ?, hand = ?, hold_mask = ?, updated = ? WHERE id = ?
+"""
+_INSERT_HAND = "INSERT INTO hands (session_id, dealt, hold_mask, final, bet, payout, credits) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+
+class SessionStore:
+    """Checkpoints PokerGame sessions and their completed hands to SQLite.
+
+    PokerGame calls checkpoint() after every state change and record_hand()
+    for every completed hand. Both only queue the change in memory; the queue
+    is written in one transaction (group commit) once commit_every hands are
+    waiting or commit_interval seconds have passed, so a hand costs
+    microseconds. The exception is the draw: it commits at once (durable=True),
+    since a drawn hand that came back as "holding" after a crash could be
+    drawn again. The database runs in WAL mode, so a crash
+    loses at most the changes queued since the last commit and never corrupts
+    earlier ones.
+    Call commit_if_due() from an idle loop so a paused game is still saved.
+    """
+
+    def __init__(self, path: str, commit_every: int = 256, commit_interval: float = 1.0):
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        # Autocommit mode: transactions are opened explicitly by commit()
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints: a committed batch survives an application crash
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._states: Dict[int, tuple] = {}  # Session id -> latest queued UPDATE parameters
+        self._hands: List[tuple] = []
+        self._last_commit = time.monotonic()
+        self.commits = 0
+
+    def _session_id(self, game) -> int:
+        if game.session_id is None:
+            cursor = self.connection.execute(
+                "INSERT INTO sessions (variant, starting_credits, credits, max_credits, min_credits, current_bet, "
+                "initial_bet, game_state, hold_mask, updated) VALUES (?, ?, ?, ?, ?, 0, 0, 'betting', 0, ?)",
+                (game.variant.name, game.starting_credits, game.credits, game.max_credits, game.min_credits,
+                 time.time()))
+            game.session_id = cursor.lastrowid
+            game_logger.info("Persisting session %d to %s", game.session_id, self.path)
+        return game.session_id
+
+    def checkpoint(self, game, durable: bool = False):
+        """Queue the current state of a game, or with durable write it before returning"""
+        session_id = self._session_id(game)
+        dealt = hand = None
+        hold_mask = 0
+        if game.game_state != "betting" and len(game.hand) == 5:
+            dealt = pack_cards(game.initial_codes)
+            hand = pack_cards(game.hand_codes)
+            if game.game_state == "holding":
+                for i, card in enumerate(game.hand):
+                    if card.held:
+                        hold_mask |= 1 << i
+            else:
+                hold_mask = game.hold_mask
+        state = (game.credits, game.max_credits, game.min_credits, game.current_bet, game.initial_bet,
+                 game.game_state, dealt, hand, hold_mask, time.time(), session_id)
+        self._states[session_id] = state
+        if durable:
+            # The queued hands go in the same transaction, so the credits never get ahead of them
+            self.commit()
+        else:
+            self.commit_if_due()
+
+    def record_hand(self, game, payout: int):
+        """Queue a completed hand, before the game resets for the next one"""
+        self._hands.append((self._session_id(game), pack_cards(game.initial_codes), game.hold_mask,
+                            pack_cards(game.hand_codes), game.current_bet, payout, game.credits))
+
+    def commit_if_due(self):
+        if len(self._hands) >= self.commit_every or time.monotonic() - self._last_commit >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        """Write everything queued in one transaction"""
+        self._last_commit = time.monotonic()
+        if not self._states and not self._hands:
+            return
+        connection = self.connection
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(_INSERT_HAND, self._hands)
+            connection.executemany(_UPDATE_SESSION, self._states.values())
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._hands.clear()
+        self._states.clear()
+        self.commits += 1
+
+    def close(self):
+        if self.connection is not None:
+            self.commit()
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def latest_session(self) -> Optional[int]:
+        row = self.connection.execute("SELECT max(id) FROM sessions").fetchone()
+        return row[0]
+
+    def restore(self, game, session_id: Optional[int] = None) -> bool:
+        """Load a saved session (the latest by default) into a game, in the state it was saved in.
+
+        A hand that was being held comes back with the same cards and holds; a
+        hand that was drawn but not yet paid comes back "evaluating", so
+        evaluating and collecting it pays what is owed. Returns False when
+        there is nothing to restore.
+        """
+        if session_id is None:
+            session_id = self.latest_session()
+            if session_id is None:
+                return False
+        row = self.connection.execute(
+            "SELECT variant, starting_credits, credits, max_credits, min_credits, current_bet, initial_bet, "
+            "game_state, dealt, hand, hold_mask FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return False
+        (variant, game.starting_credits, game.credits, game.max_credits, game.min_credits, game.current_bet,
+         game.initial_bet, state, dealt, hand, hold_mask) = row
+        game.variant = get_variant(variant)
+        game.session_id = session_id
+        game.reset_for_new_hand()
+        if state != "betting" and hand is not None:
+            dealt_codes = unpack_cards(dealt)
+            hand_codes = unpack_cards(hand)
+            # Take every card seen this hand out of the undealt part of the deck
+            seen = list(dict.fromkeys(dealt_codes + hand_codes))
+            deck = game.deck
+            for i, code in enumerate(seen):
+                j = deck.index(code)
+                deck[i], deck[j] = deck[j], deck[i]
+            game.dealt = len(seen)
+            game.initial_hand.extend(game.cards[code] for code in dealt_codes)
+            game.hand.extend(game.cards[code] for code in hand_codes)
+            game.initial_codes[:] = dealt_codes
+            game.hand_codes[:] = hand_codes
+            for i, card in enumerate(game.hand):
+                card.held = state == "holding" and bool(hold_mask >> i & 1)
+            game.hold_mask = hold_mask
+            game.face_up[:] = [True] * 5
+            game.game_state = state
+        game_logger.info("Restored session %d: %s with %d credits", session_id, game.game_state, game.credits)
+        return True
@@ -1,17 +1,24 @@
 import random
+import logging
 from typing import List, Tuple
-from collections import Counter  # Import Counter from collections module
 from .logger import game_logger
+from .evaluator import card_code
+from .variants import get_variant
+from . import strategy_table
 
 class Card:
     def __init__(self, suit: str, rank: str):
         self.suit = suit
         self.rank = rank
         self.held = False
+        self.code = card_code(suit, rank)  # Integer encoding used by the evaluator
 
     def __str__(self):
         return f"{self.rank}{self.suit}"
 
+_FACE_UP = (True,) * 5
+_FACE_DOWN = (False,) * 5
+
 class PokerGame:
     SUITS = ['♠', '♥', '♦', '♣']  # Unicode symbols for card suits
     SUITS_UNICODE = {
@@ -22,160 +29,141 @@ class PokerGame:
     }
     RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
     
-    def __init__(self):
-        self.deck = []  # All cards not in player's hand
+    def __init__(self, rng=None, credits: int = 100, history=None, variant=None, store=None):
+        # Any object with random.Random's interface; defaults to the global random module
+        self.rng = rng if rng is not None else random
+        self.history = history  # Optional HandHistoryWriter (see game/history.py)
+        self.store = store  # Optional SessionStore checkpointing every state change (see game/persistence.py)
+        self.session_id = None  # Assigned by the store
+        self.variant = get_variant(variant)  # Hand categories and paytable (see game/variants.py)
+        # One Card object per card code, created once and reused for every hand
+        self.cards = [None] * 52
+        for suit in self.SUITS:
+            for rank in self.RANKS:
+                card = Card(suit, rank)
+                self.cards[card.code] = card
+        # Persistent 52-slot deck of card codes: slots before self.dealt hold the cards
+        # dealt this hand, the rest are still available
+        self.deck = list(range(52))
+        self.dealt = 0
         self.hand = []  # Current player's hand (5 cards)
         self.initial_hand = []  # Store the initial hand before draws
+        # Card codes of initial_hand and hand, kept up to date so scoring a hand allocates nothing
+        self.initial_codes = [0] * 5
+        self.hand_codes = [0] * 5
         self.face_up = [False] * 5
-        self.credits = 100
-        self.starting_credits = 100  # Track initial credits
-        self.max_credits = 100  # Track highest balance
-        self.min_credits = 100  # Track lowest balance
+        self.credits = credits
+        self.starting_credits = credits  # Track initial credits
+        self.max_credits = credits  # Track highest balance
+        self.min_credits = credits  # Track lowest balance
         self.current_bet = 0
         self.initial_bet = 0  # Store the initial bet for endurance mode
+        self.hold_mask = 0  # Cards held at the last draw (bit i = card i)
         self.game_state = "betting"
         self.show_result = False  # Initialize the flag
-        game_logger.info("Game initialized with 100 credits")
+        game_logger.info("Game initialized with %d credits (%s)", credits, self.variant.title)
         self.initialize_deck()
 
     def initialize_deck(self):
-        # Create a fresh 52-card deck
-        self.deck = [Card(suit, rank) for suit in self.SUITS for rank in self.RANKS]
-        self.shuffle_remaining_cards()
-        game_logger.debug("New deck initialized and shuffled")
-        
-    def shuffle_remaining_cards(self):
-        # Continuously shuffle cards not in player's hand
-        random.shuffle(self.deck)
-        game_logger.debug(f"Shuffled remaining {len(self.deck)} cards")
+        # Return every card to the deck. No shuffle is needed: each draw picks
+        # uniformly among the remaining slots (see draw_card)
+        self.dealt = 0
+        game_logger.debug("New deck initialized")
+        
+    def draw_card(self) -> Card:
+        # One step of a partial Fisher-Yates shuffle: swap a uniformly chosen
+        # remaining card into the next slot and deal it
+        deck = self.deck
+        i = self.dealt
+        j = self.rng.randrange(i, 52)
+        deck[i], deck[j] = deck[j], deck[i]
+        self.dealt = i + 1
+        card = self.cards[deck[i]]
+        card.held = False
+        return card
         
     def deal_initial_hand(self):
         if self.current_bet <= 0:
             game_logger.warning("Attempted to deal without a bet")
             return False
             
-        game_logger.info(f"Dealing initial hand with bet: {self.current_bet}")
+        game_logger.info("Dealing initial hand with bet: %d", self.current_bet)
         
         # Start fresh with all 52 cards
         self.initialize_deck()
-        self.hand = []
-        self.initial_hand = []  # Clear initial hand
-        self.face_up = [True] * 5  # Make cards face up immediately
+        self.hand.clear()
+        self.initial_hand.clear()  # Clear initial hand
+        self.face_up[:] = _FACE_UP  # Make cards face up immediately
             
         # Deal 5 cards from deck
-        for _ in range(5):
-            card = self.deck.pop()
+        for i in range(5):
+            card = self.draw_card()
             self.hand.append(card)
-            game_logger.debug(f"Dealt card: {card}")
+            self.hand_codes[i] = self.initial_codes[i] = card.code
+            game_logger.debug("Dealt card: %s", card)
             
-        # Store initial hand
-        self.initial_hand = [Card(card.suit, card.rank) for card in self.hand]
-            
-        # Shuffle remaining 47 cards
-        self.shuffle_remaining_cards()
+        # Store initial hand (cards are never modified, so references are enough)
+        self.initial_hand.extend(self.hand)
         
-        game_logger.info(f"Initial hand: {[str(card) for card in self.hand]}")
+        if game_logger.is_enabled(logging.INFO):
+            game_logger.info("Initial hand: %s", [str(card) for card in self.hand])
         self.game_state = "holding"
+        if self.store is not None:
+            self.store.checkpoint(self)
         return True
         
+    def optimal_hold(self) -> int:
+        """Hold mask (bit i holds card i) with the highest expected return for the dealt hand"""
+        return strategy_table.optimal_hold(self.hand, self.variant)
+        
     def reveal_cards(self):
-        self.face_up = [True] * 5
+        self.face_up[:] = _FACE_UP
         game_logger.info("Cards revealed")
         
     def hold_card(self, index: int):
         if 0 <= index < len(self.hand) and self.face_up[index] and self.game_state == "holding":
             self.hand[index].held = not self.hand[index].held
-            game_logger.info(f"Card {index} ({'held' if self.hand[index].held else 'unheld'}): {self.hand[index]}")
+            game_logger.info("Card %d (%s): %s", index, 'held' if self.hand[index].held else 'unheld', self.hand[index])
+            if self.store is not None:
+                self.store.checkpoint(self)
             
     def draw_new_cards(self):
         game_logger.info("Drawing new cards")
         
-        held_cards = []
+        self.hold_mask = 0
         for i, card in enumerate(self.hand):
             if card.held:
-                held_cards.append(str(card))
-            else:
-                # Return non-held cards to deck and shuffle
-                self.deck.append(self.hand[i])
-                self.shuffle_remaining_cards()
+                self.hold_mask |= 1 << i
         
-        game_logger.info(f"Held cards: {held_cards}")
+        if game_logger.is_enabled(logging.INFO):
+            game_logger.info("Held cards: %s", [str(card) for card in self.hand if card.held])
         
-        # Draw new cards from the continuously shuffled deck
+        # Replace the discards from the 47 undealt cards; discards are not drawn again
         for i in range(len(self.hand)):
             if not self.hand[i].held:
-                new_card = self.deck.pop()
-                game_logger.debug(f"Replacing card {i} ({self.hand[i]}) with {new_card}")
+                new_card = self.draw_card()
+                game_logger.debug("Replacing card %d (%s) with %s", i, self.hand[i], new_card)
                 self.hand[i] = new_card
+                self.hand_codes[i] = new_card.code
                 self.face_up[i] = True
             self.hand[i].held = False
             
-        game_logger.info(f"Final hand: {[str(card) for card in self.hand]}")
-        game_logger.debug(f"Cards remaining in deck: {len(self.deck)}")
+        if game_logger.is_enabled(logging.INFO):
+            game_logger.info("Final hand: %s", [str(card) for card in self.hand])
+        game_logger.debug("Cards remaining in deck: %d", 52 - self.dealt)
         self.game_state = "evaluating"
+        if self.store is not None:
+            # Written at once: a drawn hand restored as "holding" could be drawn again
+            self.store.checkpoint(self, durable=True)
             
     def evaluate_hand(self) -> Tuple[str, int]:
         game_logger.info("Evaluating hand")
-        ranks = [self.RANKS.index(card.rank) for card in self.hand]
-        suits = [card.suit for card in self.hand]
-        
-        # Sort ranks for easier evaluation
-        ranks.sort()
-        
-        # Check for flush
-        is_flush = len(set(suits)) == 1
-        
-        # Check for straight
-        is_straight = False
-        if len(set(ranks)) == 5:  # All ranks must be different for a straight
-            sorted_ranks = sorted(ranks)
-            # Check for Ace-low straight (A,2,3,4,5)
-            if sorted_ranks == [0, 1, 2, 3, 12]:  # 12 is Ace
-                is_straight = True
-            # Check for regular straight (including Ace-high)
-            elif sorted_ranks == [i for i in range(min(ranks), max(ranks) + 1)]:
-                is_straight = True
-        
-        # Count rank frequencies
-        rank_counts = Counter(ranks)
-        max_count = max(rank_counts.values())
-        
-        # Evaluate hand
-        hand_type = "No Win"
-        winnings = 0
-        
-        if is_straight and is_flush:
-            if ranks == [8, 9, 10, 11, 12]:  # Royal Flush
-                hand_type = "Royal Flush"
-                winnings = self.current_bet * 800
-            else:  # Straight Flush
-                hand_type = "Straight Flush"
-                winnings = self.current_bet * 50
-        elif max_count == 4:
-            hand_type = "Four of a Kind"
-            winnings = self.current_bet * 25
-        elif sorted(rank_counts.values()) == [2, 3]:
-            hand_type = "Full House"
-            winnings = self.current_bet * 9
-        elif is_flush:
-            hand_type = "Flush"
-            winnings = self.current_bet * 6
-        elif is_straight:
-            hand_type = "Straight"
-            winnings = self.current_bet * 4
-        elif max_count == 3:
-            hand_type = "Three of a Kind"
-            winnings = self.current_bet * 3
-        elif list(rank_counts.values()).count(2) == 2:
-            hand_type = "Two Pair"
-            winnings = self.current_bet * 2
-        elif max_count == 2:
-            pair_rank = max(rank_counts.items(), key=lambda x: (x[1], x[0]))[0]
-            if pair_rank >= self.RANKS.index('J'):  # Jacks or Better
-                hand_type = "Jacks or Better"
-                winnings = self.current_bet
-        
-        game_logger.info(f"Hand evaluation: {hand_type}, Winnings: {winnings}")
+        # Table lookup on the integer card codes (see game/variants.py)
+        category = self.variant.evaluate(self.hand_codes)
+        hand_type = self.variant.hand_names[category]
+        winnings = self.current_bet * self.variant.payouts[category]
+        
+        game_logger.info("Hand evaluation: %s, Winnings: %d", hand_type, winnings)
         self.show_result = True  # Add this flag to indicate we should show the result
         return hand_type, winnings
         
@@ -197,15 +185,21 @@ class PokerGame:
         
         if amount > 0:
             self.credits += amount
-            game_logger.info(f"Collected winnings: {amount}, New credits: {self.credits}")
+            game_logger.info("Collected winnings: %d, New credits: %d", amount, self.credits)
         else:
             # Just log the loss since we already subtracted the bet
-            game_logger.info(f"No winnings. Lost bet of {self.current_bet}. Credits: {self.credits}")
+            game_logger.info("No winnings. Lost bet of %d. Credits: %d", self.current_bet, self.credits)
             
         # Update min/max credit tracking
         self.min_credits = min(self.min_credits, self.credits)
         self.max_credits = max(self.max_credits, self.credits)
         
+        if self.history is not None and self.initial_hand:
+            self.history.record(self.initial_codes, self.hold_mask, self.hand_codes, self.current_bet, amount,
+                                self.credits)
+        if self.store is not None and self.initial_hand:
+            self.store.record_hand(self, amount)
+        
         # In endurance mode, preserve the initial bet
         saved_bet = self.initial_bet
         self.current_bet = 0
@@ -213,27 +207,31 @@ class PokerGame:
         # Restore the initial bet if we're in endurance mode
         if saved_bet > 0:
             self.current_bet = saved_bet
+        if self.store is not None:
+            self.store.checkpoint(self)
             
     def reset_for_new_hand(self):
-        game_logger.info(f"Reset for new hand. Credits: {self.credits}")
+        game_logger.info("Reset for new hand. Credits: %d", self.credits)
         # Don't reset the bet amount - keep it consistent for the session
-        self.hand = []
-        self.initial_hand = []  # Clear initial hand
-        self.face_up = [False] * 5
+        self.hand.clear()
+        self.initial_hand.clear()  # Clear initial hand
+        self.face_up[:] = _FACE_DOWN
         self.game_state = "betting"
         self.show_result = False
         self.initialize_deck()
         
     def place_bet(self, amount: int):
         if self.game_state != "betting":
-            game_logger.warning(f"Attempted to bet {amount} in invalid state: {self.game_state}")
+            game_logger.warning("Attempted to bet %d in invalid state: %s", amount, self.game_state)
             return False
             
         if 1 <= amount <= 5 and amount <= self.credits:
             self.current_bet = amount
             # Don't subtract credits here anymore, we'll do it in collect_winnings
-            game_logger.info(f"Bet placed: {amount}, Credits remaining: {self.credits}")
+            game_logger.info("Bet placed: %d, Credits remaining: %d", amount, self.credits)
+            if self.store is not None:
+                self.store.checkpoint(self)
             return True
             
-        game_logger.warning(f"Invalid bet amount: {amount}, Credits: {self.credits}")
+        game_logger.warning("Invalid bet amount: %s, Credits: %d", amount, self.credits)
         return False
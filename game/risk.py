@@ -0,0 +1,217 @@
+import itertools
+import numpy as np
+from collections import Counter
+from functools import lru_cache
+from math import prod
+from typing import List, Optional, Sequence, Tuple
+from .evaluator import RANK_PRIMES, CARD_PRIME
+from .solver import DRAW_COMBINATIONS, _draw_weights
+from .strategy_table import canonical_hand
+from .variants import Variant, get_variant
+
+RISK_MODES = ('ev', 'variance', 'ruin')
+DEFAULT_VARIANCE_WEIGHT = 0.01
+DEFAULT_HORIZON = 1000
+# Scores closer than this are a tie, broken by the higher expected return
+SCORE_EPSILON = 1e-12
+
+
+@lru_cache(maxsize=8192)
+def _rank_counts(ranks: Tuple[int, ...], variant: Variant) -> Tuple[Tuple[int, ...], ...]:
+    """Draws ending in each hand category for every hold, scoring all draws as if they were not flushes.
+
+    Depends only on the sorted dealt ranks (6,175 possibilities per variant), so
+    it is shared by every deal with the same ranks; masks refer to positions in
+    the sorted rank tuple.
+    """
+    category_table = variant.category_table
+    deck_counts = [4] * 13
+    for rank in ranks:
+        deck_counts[rank] -= 1
+    levels = _draw_weights(deck_counts)
+
+    rows = []
+    for mask in range(32):
+        held_product = 1
+        for i in range(5):
+            if mask >> i & 1:
+                held_product *= RANK_PRIMES[ranks[i]]
+        keys, ways = levels[5 - bin(mask).count('1')]
+        counts = [0] * len(variant.hand_names)
+        for category, n in zip(map(category_table.__getitem__, map(held_product.__mul__, keys)), ways):
+            counts[category] += n
+        rows.append(tuple(counts))
+    return tuple(rows)
+
+
+@lru_cache(maxsize=65536)
+def _flush_moves(held_key: int, suited_primes: Tuple[int, ...], draw_size: int,
+                 variant: Variant) -> Tuple[Tuple[Tuple[int, int], int], ...]:
+    """Draws that complete a flush in one suit, as ((category unsuited, category suited), draws)"""
+    table = variant.category_table
+    moves = Counter()
+    for draw in itertools.combinations(suited_primes, draw_size):
+        key = held_key * prod(draw)
+        moves[table[key], table[key | 1]] += 1
+    return tuple(moves.items())
+
+
+@lru_cache(maxsize=65536)
+def _class_counts(hand: Tuple[int, ...], variant: Variant) -> Tuple[Tuple[int, ...], ...]:
+    """Category counts of every hold of a sorted hand; the same for every hand of its suit class"""
+    rows = [list(row) for row in _rank_counts(tuple(code >> 2 for code in hand), variant)]
+
+    # Unseen card primes per suit, as in solver.hold_totals: wild cards fit every suit
+    dealt = set(hand)
+    wild = variant.is_wild
+    suited_primes = [tuple(RANK_PRIMES[rank] for rank in range(13)
+                           if rank * 4 + suit not in dealt and not wild(rank * 4 + suit))
+                     + tuple(CARD_PRIME[code] for code in range(52) if wild(code) and code not in dealt)
+                     for suit in range(4)]
+
+    for mask in range(32):
+        held = [hand[i] for i in range(5) if mask >> i & 1]
+        held_suits = {code & 3 for code in held if not wild(code)}
+        if len(held_suits) <= 1:
+            held_key = 2
+            for code in held:
+                held_key *= CARD_PRIME[code]
+            row = rows[mask]
+            for suit in held_suits or range(4):
+                for (unsuited, suited), n in _flush_moves(held_key, suited_primes[suit], 5 - len(held), variant):
+                    row[unsuited] -= n
+                    row[suited] += n
+    return tuple(tuple(row) for row in rows)
+
+
+def hold_distributions(codes: Sequence[int], variant=None) -> List[Tuple[int, ...]]:
+    """Exact distribution of the final hand category for each of the 32 hold masks.
+
+    Entry [mask][category] is the number of draws that end in that category
+    (hand_names order); each row sums to DRAW_COMBINATIONS[number of discarded
+    cards]. Results are cached per suit-isomorphic class, on top of LRU-cached
+    tables shared by all deals with the same ranks.
+    """
+    variant = get_variant(variant)
+    _, order, hand = canonical_hand(codes)
+    rows = _class_counts(tuple(hand), variant)
+    result = [None] * 32
+    for canonical_mask in range(32):
+        mask = 0
+        for i in range(5):
+            if canonical_mask >> i & 1:
+                mask |= 1 << order[i]
+        result[mask] = rows[canonical_mask]
+    return result
+
+
+def hold_probabilities(codes: Sequence[int], variant=None) -> np.ndarray:
+    """Probability of each final hand category (columns) for each hold mask (rows)"""
+    counts = np.array(hold_distributions(codes, variant), dtype=np.float64)
+    draws = np.array([DRAW_COMBINATIONS[5 - bin(mask).count('1')] for mask in range(32)], dtype=np.float64)
+    return counts / draws[:, None]
+
+
+def hold_moments(codes: Sequence[int], variant=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and variance of the payout multiplier (per credit bet) for each hold mask"""
+    variant = get_variant(variant)
+    probabilities = hold_probabilities(codes, variant)
+    payouts = np.array(variant.payouts, dtype=np.float64)
+    means = probabilities @ payouts
+    return means, probabilities @ payouts ** 2 - means ** 2
+
+
+@lru_cache(maxsize=16)
+def _ruin_table(variant_name: str, horizon: int) -> np.ndarray:
+    # Probability of going broke within horizon hands from 0 .. horizon + 1 bets; 0 from horizon + 1 up
+    from .bankroll import ruin_by_bankroll
+    return ruin_by_bankroll(horizon, horizon + 2, variant=variant_name)
+
+
+class RiskStrategy:
+    """Holds chosen by a utility of each hold's full outcome distribution, not just its mean.
+
+    ev       -- highest expected return: the optimal strategy
+    variance -- highest mean - k * variance of the payout multiplier; a larger k
+                gives up return for a steadier bankroll
+    ruin     -- lowest probability of going broke within horizon hands from the
+                credits left after this hand, with optimal play afterwards (exact,
+                see game.bankroll); ties go to the higher expected return
+
+    hold() takes the credits and bet explicitly. For use as a strategy callable,
+    bind() a PokerGame; then __call__(hand) reads them from the game.
+    """
+
+    def __init__(self, mode: str = 'ev', variant=None, k: float = DEFAULT_VARIANCE_WEIGHT,
+                 horizon: int = DEFAULT_HORIZON):
+        if mode not in RISK_MODES:
+            raise ValueError(f"Unknown risk mode {mode!r}, expected one of {', '.join(RISK_MODES)}")
+        self.mode = mode
+        self.variant = get_variant(variant)
+        self.k = k
+        self.horizon = horizon
+        self.game = None
+
+    @classmethod
+    def parse(cls, spec: str, variant=None) -> 'RiskStrategy':
+        """Strategy from a command-line spec: ev, variance[:K] or ruin[:HANDS]"""
+        mode, _, value = spec.partition(':')
+        if mode == 'variance' and value:
+            return cls(mode, variant, k=float(value))
+        if mode == 'ruin' and value:
+            return cls(mode, variant, horizon=int(value))
+        if value:
+            raise ValueError(f"Risk mode {mode!r} takes no parameter")
+        return cls(mode, variant)
+
+    @property
+    def label(self) -> str:
+        if self.mode == 'variance':
+            return f"Mean - {self.k:g} x variance"
+        if self.mode == 'ruin':
+            return f"Ruin within {self.horizon} hands"
+        return "Expected return"
+
+    def prepare(self) -> 'RiskStrategy':
+        """Compute what the mode needs up front: ruin mode's table takes seconds, once per variant"""
+        self.variant.category_table
+        if self.mode == 'ruin':
+            _ruin_table(self.variant.name, self.horizon)
+        return self
+
+    def bind(self, game) -> 'RiskStrategy':
+        self.game = game
+        return self
+
+    def scores(self, codes: Sequence[int], credits: Optional[int] = None,
+               bet: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """What the mode maximizes for every hold (minus the ruin probability in ruin mode), and the means"""
+        if self.mode == 'ruin':
+            if not credits or not bet:
+                raise ValueError("ruin mode needs the credits and the bet")
+            probabilities = hold_probabilities(codes, self.variant)
+            means = probabilities @ np.array(self.variant.payouts, dtype=np.float64)
+            # The bet is paid at the end of the hand: bankroll in bets afterwards, per final category
+            after = credits // bet - 1 + np.array(self.variant.payouts)
+            ruin = _ruin_table(self.variant.name, self.horizon)
+            return -(probabilities @ ruin[np.minimum(after, self.horizon + 1)]), means
+        means, variances = hold_moments(codes, self.variant)
+        if self.mode == 'variance':
+            return means - self.k * variances, means
+        return means, means
+
+    @staticmethod
+    def choose(scores: np.ndarray, means: np.ndarray) -> int:
+        """Hold mask with the best score; ties go to the higher mean, then the lower mask"""
+        tied = np.flatnonzero(scores >= scores.max() - SCORE_EPSILON)
+        return int(tied[np.argmax(means[tied])])
+
+    def hold(self, codes: Sequence[int], credits: Optional[int] = None, bet: Optional[int] = None) -> int:
+        """Hold mask (bit i holds card i) for a dealt hand of card codes"""
+        return self.choose(*self.scores(codes, credits, bet))
+
+    def __call__(self, hand) -> int:
+        game = self.game
+        if game is None:
+            return self.hold([card.code for card in hand])
+        return self.hold([card.code for card in hand], game.credits, game.current_bet)
@@ -0,0 +1,211 @@
+import sys
+import time
+import argparse
+import itertools
+import numpy as np
+from fractions import Fraction
+from math import comb
+from typing import Dict, Optional, Sequence
+from .logger import game_logger
+from .variants import DEFAULT_VARIANT, VARIANT_DEFINITIONS, get_variant
+from .batch import canonicalize_many, evaluate_many, _COLEX
+
+TOTAL_DEALS = comb(52, 5)
+DRAW_COMBINATIONS = np.array([comb(47, m) for m in range(6)], dtype=np.int64)
+# Number of cards held by each of the 32 hold masks
+HELD_COUNT = np.array([bin(mask).count('1') for mask in range(32)])
+
+
+def all_hands() -> np.ndarray:
+    """Every 5-card hand as a (2598960, 5) array of ascending card codes"""
+    flat = np.fromiter(itertools.chain.from_iterable(itertools.combinations(range(52), 5)),
+                       dtype=np.int8, count=5 * TOTAL_DEALS)
+    return flat.reshape(-1, 5)
+
+
+def _subset_index(hands: np.ndarray, mask: int) -> np.ndarray:
+    # Colex index of the cards selected by mask; rows are ascending, so any subset is too
+    index = np.zeros(len(hands), dtype=np.int64)
+    for j, position in enumerate(i for i in range(5) if mask >> i & 1):
+        index += _COLEX[j][hands[:, position]]
+    return index
+
+
+class DrawCounter:
+    """Exact final-hand category counts for every hold of any dealt hand.
+
+    For every card subset T of size 0-4, counts[|T|][index(T)] holds how many of
+    the 2,598,960 five-card hands contain T, per hand category. The number of
+    final hands reachable from a hold H -- containing H and none of the
+    discards D -- then follows by inclusion-exclusion over the subsets of D,
+    computed for all 32 holds at once as a Moebius transform.
+    """
+
+    def __init__(self, hands: Optional[np.ndarray] = None, categories: Optional[np.ndarray] = None,
+                 num_categories: Optional[int] = None, variant=None):
+        variant = get_variant(variant)
+        if hands is None:
+            hands = all_hands()
+        if categories is None:
+            categories = evaluate_many(hands, variant)
+        self.variant = variant
+        self.num_categories = num_categories or len(variant.hand_names)
+        categories = categories.astype(np.int64)
+        self.counts = []
+        for size in range(5):
+            table = np.zeros(comb(52, size) * self.num_categories, dtype=np.int64)
+            for mask in range(32):
+                if HELD_COUNT[mask] == size:
+                    table += np.bincount(_subset_index(hands, mask) * self.num_categories + categories,
+                                         minlength=len(table))
+            self.counts.append(table.reshape(-1, self.num_categories).astype(np.int32))
+
+    def hold_counts(self, hands: np.ndarray, final_categories: np.ndarray) -> np.ndarray:
+        """Category counts of each hold for ascending (n, 5) dealt hands.
+
+        final_categories are the categories of the dealt hands themselves. Returns
+        an (n, 32, num_categories) array; entry [h, mask, c] is the number of
+        draws after holding mask that end in category c.
+        """
+        n = len(hands)
+        result = np.empty((n, 32, self.num_categories), dtype=np.int32)
+        # Hands containing all of T, for every subset T of the dealt cards
+        for mask in range(31):
+            result[:, mask] = self.counts[HELD_COUNT[mask]][_subset_index(hands, mask)]
+        result[:, 31] = 0
+        result[np.arange(n), 31, final_categories] = 1
+        # Moebius transform over supersets: keep only hands that avoid the discards
+        for bit in range(5):
+            for mask in range(32):
+                if not mask >> bit & 1:
+                    result[:, mask] -= result[:, mask | 1 << bit]
+        return result
+
+
+def canonical_deals():
+    """Representative (canonical, ascending) hand and weight of every suit-isomorphic class.
+
+    Returns (class indices, hands, weights) sorted by class index.
+    """
+    index, _, canonical = canonicalize_many(all_hands())
+    keys, first, weights = np.unique(index, return_index=True, return_counts=True)
+    return keys, canonical[first].astype(np.int8), weights
+
+
+def analyze(variant=None, payouts: Optional[Sequence[int]] = None, chunk_size: int = 16384,
+            counter: Optional[DrawCounter] = None, keep_holds: bool = False) -> Dict:
+    """Exact return and final hand-type probabilities of a variant under optimal play.
+
+    payouts are multipliers per hand category of the variant and default to
+    its own paytable. With keep_holds the result also carries, per canonical
+    class, the optimal hold mask (bits refer to the canonical ascending hand)
+    and the exact payout totals of all 32 holds.
+    """
+    start = time.perf_counter()
+    variant = get_variant(variant)
+    payouts = list(payouts or variant.payouts)
+    if len(payouts) != len(variant.hand_names):
+        raise ValueError(f"{variant.name} has {len(variant.hand_names)} hand categories, got {len(payouts)} payouts")
+    if counter is None or counter.variant is not variant:
+        counter = DrawCounter(variant=variant)
+    keys, hands, weights = canonical_deals()
+    pay = np.asarray(payouts, dtype=np.int64)
+    denominators = DRAW_COMBINATIONS[5 - HELD_COUNT]
+
+    best_masks = np.empty(len(keys), dtype=np.uint8)
+    all_totals = np.empty((len(keys), 32), dtype=np.int64) if keep_holds else None
+    # Exact sums, grouped by number of cards drawn: weight * payout total, and weight * category count
+    return_sums = np.zeros(6, dtype=np.int64)
+    category_sums = np.zeros((6, len(pay)), dtype=np.int64)
+    for lo in range(0, len(keys), chunk_size):
+        chunk = hands[lo:lo + chunk_size]
+        counts = counter.hold_counts(chunk, evaluate_many(chunk, variant))
+        totals = counts @ pay
+        best = np.argmax(totals / denominators, axis=1)
+        best_masks[lo:lo + chunk_size] = best
+        if keep_holds:
+            all_totals[lo:lo + chunk_size] = totals
+
+        w = weights[lo:lo + chunk_size].astype(np.int64)
+        drawn = 5 - HELD_COUNT[best]
+        best_counts = counts[np.arange(len(chunk)), best].astype(np.int64)
+        np.add.at(return_sums, drawn, w * totals[np.arange(len(chunk)), best])
+        np.add.at(category_sums, drawn, w[:, None] * best_counts)
+
+    rtp = sum(Fraction(int(return_sums[m]), int(DRAW_COMBINATIONS[m])) for m in range(6)) / TOTAL_DEALS
+    probabilities = {}
+    for category, name in enumerate(variant.hand_names):
+        probability = sum(Fraction(int(category_sums[m, category]), int(DRAW_COMBINATIONS[m])) for m in range(6))
+        probabilities[name] = probability / TOTAL_DEALS
+    game_logger.summary("Exact analysis of %s paytable %s in %.1fs: return %.6f%%",
+                        variant.name, payouts, time.perf_counter() - start, float(rtp) * 100)
+
+    result = {
+        'variant': variant.name,
+        'payouts': payouts,
+        'rtp': float(rtp),
+        'rtp_exact': rtp,
+        'probabilities': {name: float(p) for name, p in probabilities.items()},
+        'probabilities_exact': probabilities,
+    }
+    if keep_holds:
+        result.update(class_keys=keys, class_hands=hands, class_weights=weights,
+                      best_masks=best_masks, hold_totals=all_totals)
+    return result
+
+
+def verify_brute_force(hands_per_variant: int = 1, seed: int = 0) -> int:
+    """Check analyze() against solver.brute_force_totals on random deal classes of every variant.
+
+    For each checked class, the exact totals of all 32 holds and the EV of the
+    hold analyze() plays must match brute force. Returns the number of hands
+    checked and raises AssertionError on the first mismatch.
+    """
+    import random
+    from .solver import brute_force_totals
+    rng = random.Random(seed)
+    checked = 0
+    for name in VARIANT_DEFINITIONS:
+        result = analyze(name, keep_holds=True)
+        for row in rng.sample(range(len(result['class_keys'])), hands_per_variant):
+            codes = [int(code) for code in result['class_hands'][row]]
+            expected = brute_force_totals(codes, name)
+            actual = [int(total) for total in result['hold_totals'][row]]
+            if actual != expected:
+                mask = next(mask for mask in range(32) if actual[mask] != expected[mask])
+                raise AssertionError(f"{name} {codes} hold {mask:05b}: analyze gives {actual[mask]}, "
+                                     f"brute force {expected[mask]}")
+            evs = [Fraction(expected[mask], int(DRAW_COMBINATIONS[5 - HELD_COUNT[mask]])) for mask in range(32)]
+            if evs[result['best_masks'][row]] != max(evs):
+                raise AssertionError(f"{name} {codes}: analyze plays hold {result['best_masks'][row]:05b}, "
+                                     f"not the best EV {float(max(evs))}")
+            checked += 1
+    return checked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exact return of a paytable under optimal play")
+    parser.add_argument('payouts', nargs='*', type=int,
+                        help="multipliers for each hand category of the variant (default: its own paytable)")
+    parser.add_argument('--variant', choices=list(VARIANT_DEFINITIONS), default=DEFAULT_VARIANT)
+    parser.add_argument('--verify', action='store_true',
+                        help="cross-check the analysis of every variant against brute force and exit")
+    args = parser.parse_args(argv)
+    if args.verify:
+        start = time.perf_counter()
+        total = verify_brute_force()
+        print(f"Verified {total} hands against brute force in {time.perf_counter() - start:.1f}s")
+        return
+    variant = get_variant(args.variant)
+    if args.payouts and len(args.payouts) != len(variant.hand_names):
+        parser.error(f"expected {len(variant.hand_names)} payouts for {', '.join(variant.hand_names)}, "
+                     f"got {len(args.payouts)}")
+
+    result = analyze(variant, args.payouts)
+    print(f"{variant.title} return: {result['rtp'] * 100:.6f}%  ({result['rtp_exact']})")
+    for name, probability in result['probabilities'].items():
+        print(f"{name:>19}: {probability:.10f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
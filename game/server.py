@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+from typing import Dict, Optional
+from .logger import game_logger
+from .evaluator import code_to_str
+from .variants import DEFAULT_VARIANT, VARIANT_DEFINITIONS, get_variant
+
+# Longest request line accepted; anything longer closes the connection
+MAX_LINE = 4096
+CARD_LABELS = [code_to_str(code) for code in range(52)]
+
+
+class Session:
+    """Compact state of one player's game, one per connection.
+
+    Same rules as PokerGame (bets of 1-5, the bet is settled when the hand is
+    evaluated) but kept in a few integers, a 52-byte deck and a reused 5-slot
+    hand, so playing a hand allocates no card or hand objects.
+    """
+    __slots__ = ('credits', 'bet', 'state', 'deck', 'dealt', 'hand', 'hold_mask', 'hands_played')
+
+    def __init__(self, credits: int):
+        self.credits = credits
+        self.bet = 0
+        self.state = "betting"
+        self.deck = bytearray(range(52))
+        self.dealt = 0
+        self.hand = [0] * 5
+        self.hold_mask = 0
+        self.hands_played = 0
+
+
+class GameServer:
+    """Hosts one Session per connection and speaks newline-delimited JSON.
+
+    Every request is a JSON object with a "cmd" of place_bet (with "amount"),
+    deal, hold (with "cards", the indices to hold), draw or state. Every
+    response is one JSON line with "ok" and the session state, or "ok": false
+    and an "error". A request "id" is echoed back.
+    """
+
+    def __init__(self, variant=None, credits: int = 100, rng=None):
+        self.variant = get_variant(variant)
+        self.variant.category_table  # Compile before the first connection instead of during it
+        self.credits = credits
+        # All sessions share one generator: the event loop runs one request at a time
+        self.rng = rng if rng is not None else random.Random()
+        self.connections = 0
+        self.sessions_served = 0
+        self.commands = {
+            'place_bet': self.place_bet,
+            'deal': self.deal,
+            'hold': self.hold,
+            'draw': self.draw,
+            'state': self.state,
+        }
+
+    def state(self, session: Session, request: Dict) -> Dict:
+        response = {'ok': True, 'state': session.state, 'credits': session.credits, 'bet': session.bet}
+        if session.state == "holding":
+            response['hand'] = [CARD_LABELS[code] for code in session.hand]
+            response['held'] = [i for i in range(5) if session.hold_mask >> i & 1]
+        return response
+
+    def place_bet(self, session: Session, request: Dict) -> Dict:
+        amount = request.get('amount')
+        if session.state != "betting":
+            return _error(f"cannot bet while {session.state}")
+        if type(amount) is not int or not 1 <= amount <= 5 or amount > session.credits:
+            return _error(f"invalid bet amount {amount!r} with {session.credits} credits")
+        session.bet = amount
+        return self.state(session, request)
+
+    def deal(self, session: Session, request: Dict) -> Dict:
+        if session.state != "betting" or session.bet <= 0:
+            return _error("place a bet before dealing")
+        # Partial Fisher-Yates over the session's deck, as PokerGame.draw_card
+        deck, hand, randrange = session.deck, session.hand, self.rng.randrange
+        for i in range(5):
+            j = randrange(i, 52)
+            deck[i], deck[j] = deck[j], deck[i]
+            hand[i] = deck[i]
+        session.dealt = 5
+        session.hold_mask = 0
+        session.state = "holding"
+        return self.state(session, request)
+
+    def hold(self, session: Session, request: Dict) -> Dict:
+        if session.state != "holding":
+            return _error("no hand to hold")
+        cards = request.get('cards', ())
+        if not isinstance(cards, list) or not all(type(i) is int and 0 <= i < 5 for i in cards):
+            return _error("cards must be a list of card indices 0-4")
+        mask = 0
+        for i in cards:
+            mask |= 1 << i
+        session.hold_mask = mask
+        return self.state(session, request)
+
+    def draw(self, session: Session, request: Dict) -> Dict:
+        if session.state != "holding":
+            return _error("no hand to draw to")
+        deck, hand, randrange = session.deck, session.hand, self.rng.randrange
+        dealt = session.dealt
+        for i in range(5):
+            if not session.hold_mask >> i & 1:
+                j = randrange(dealt, 52)
+                deck[dealt], deck[j] = deck[j], deck[dealt]
+                hand[i] = deck[dealt]
+                dealt += 1
+        category = self.variant.evaluate(hand)
+        winnings = session.bet * self.variant.payouts[category]
+        session.credits += winnings - session.bet
+        session.hands_played += 1
+        session.dealt = 0
+        session.state = "betting"
+        # The bet stays in place for the next hand while it can still be covered
+        if session.bet > session.credits:
+            session.bet = 0
+        return {'ok': True, 'state': session.state, 'credits': session.credits, 'bet': session.bet,
+                'hand': [CARD_LABELS[code] for code in hand], 'hand_type': self.variant.hand_names[category],
+                'winnings': winnings}
+
+    def handle_line(self, session: Session, line: bytes) -> Dict:
+        """Run one request line against a session and return the response"""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return _error("request is not valid JSON")
+        if not isinstance(request, dict):
+            return _error("request must be a JSON object")
+        name = request.get('cmd')
+        command = self.commands.get(name) if isinstance(name, str) else None
+        response = command(session, request) if command else _error(f"unknown command {name!r}")
+        if 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = Session(self.credits)
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break  # Line over MAX_LINE, or the client went away
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = self.handle_line(session, line)
+                writer.write(json.dumps(response, ensure_ascii=False).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            self.sessions_served += 1
+            game_logger.debug("Session closed after %d hands with %d credits", session.hands_played, session.credits)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765, unix_path: Optional[str] = None,
+                    backlog: int = 4096) -> asyncio.AbstractServer:
+        """Start listening on TCP, or on a Unix socket when unix_path is given"""
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle_connection, unix_path, limit=MAX_LINE,
+                                                   backlog=backlog)
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE, backlog=backlog)
+
+
+def _error(message: str) -> Dict:
+    return {'ok': False, 'error': message}
+
+
+async def serve(server: GameServer, host: str, port: int, unix_path: Optional[str] = None):
+    listener = await server.start(host, port, unix_path)
+    if unix_path is not None:
+        address = unix_path
+    else:
+        address = '%s:%d' % listener.sockets[0].getsockname()[:2]
+    game_logger.summary("Serving %s on %s", server.variant.title, address)
+    # First line on stdout, so scripts (and benchmarks/loadgen.py) can find a port chosen with --port 0
+    print(f"Listening on {address}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Video poker server: newline-delimited JSON over TCP or a Unix socket")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765, help="TCP port; 0 picks a free one (default: 8765)")
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--variant', choices=list(VARIANT_DEFINITIONS), default=DEFAULT_VARIANT)
+    parser.add_argument('--credits', type=int, default=100, help="starting credits of every session")
+    parser.add_argument('--seed', type=int, help="seed the card generator, for reproducible runs")
+    parser.add_argument('--log-profile', choices=game_logger.PROFILES, default='simulation',
+                        help="game logging profile (default: simulation)")
+    args = parser.parse_args(argv)
+    game_logger.configure(args.log_profile)
+
+    server = GameServer(args.variant, args.credits, random.Random(args.seed))
+    if args.unix and os.path.exists(args.unix):
+        os.unlink(args.unix)  # Left over from an earlier run
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    game_logger.summary("Server stopped after %d sessions", server.sessions_served)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import itertools
+from functools import lru_cache
+from math import comb, prod
+from operator import mul
+from typing import Dict, List, Sequence, Tuple
+from .evaluator import RANK_PRIMES, CARD_PRIME
+from .variants import Variant, get_variant
+
+# Number of possible draws for each number of replaced cards, out of the 47 unseen cards
+DRAW_COMBINATIONS = [comb(47, m) for m in range(6)]
+
+
+@lru_cache(maxsize=None)
+def _flush_bonus(variant: Variant) -> Dict[int, int]:
+    """Extra payout of a flush over the same ranks unsuited, keyed like the payout table without the flush bit"""
+    table = variant.payout_table
+    return {key: table[key | 1] - table[key] for key in table if key & 1 == 0 and key | 1 in table}
+
+
+def _draw_weights(deck_counts: List[int]) -> List[Tuple[List[int], List[int]]]:
+    """Enumerate the rank multisets that can be drawn from the remaining deck.
+
+    Returns one (keys, ways) pair of parallel lists per draw size (0-5), where a
+    key is the multiset's prime product << 1. Every multiset is built once by extending a smaller one rank by rank,
+    so the ways for a 4-card draw are shared with every 5-card draw built on it.
+    """
+    levels = [[(2, 1)], [], [], [], [], []]
+    for rank in range(13):
+        available = deck_counts[rank]
+        if available == 0:
+            continue
+        steps = [(count, RANK_PRIMES[rank] ** count, comb(available, count))
+                 for count in range(1, min(available, 4) + 1)]
+        # Extend the largest multisets first so none picks up this rank twice
+        for size in range(4, -1, -1):
+            level = levels[size]
+            if not level:
+                continue
+            for count, factor, choices in steps:
+                if size + count > 5:
+                    break
+                levels[size + count] += [(key * factor, ways * choices) for key, ways in level]
+    return [([key for key, _ in level], [ways for _, ways in level]) for level in levels]
+
+
+@lru_cache(maxsize=None)
+def _rank_totals(ranks: Tuple[int, ...], variant: Variant) -> List[int]:
+    """Total payout of every hold, scoring all draws as if they were not flushes.
+
+    This part depends only on the dealt ranks, so it is cached per sorted rank
+    tuple (6,175 possibilities per variant); masks refer to positions in that
+    sorted tuple.
+    """
+    payout_table = variant.payout_table
+    deck_counts = [4] * 13
+    for rank in ranks:
+        deck_counts[rank] -= 1
+    levels = _draw_weights(deck_counts)
+
+    totals = [0] * 32
+    for mask in range(32):
+        held_product = 1
+        for i in range(5):
+            if mask >> i & 1:
+                held_product *= RANK_PRIMES[ranks[i]]
+        keys, ways = levels[5 - bin(mask).count('1')]
+        totals[mask] = sum(map(mul, ways, map(payout_table.__getitem__, map(held_product.__mul__, keys))))
+    return totals
+
+
+@lru_cache(maxsize=65536)
+def _flush_total(held_key: int, suited_primes: Tuple[int, ...], draw_size: int, variant: Variant) -> int:
+    """Extra payout over all draws that complete a flush in one suit"""
+    draws = itertools.combinations(suited_primes, draw_size)
+    return sum(map(_flush_bonus(variant).__getitem__, map(held_key.__mul__, map(prod, draws))))
+
+
+def hold_totals(codes: Sequence[int], variant=None) -> List[int]:
+    """Exact total payout multiplier over all draws for each of the 32 hold masks.
+
+    Bit i of a hold mask is set when card i is held. Dividing a total by
+    DRAW_COMBINATIONS[number of discarded cards] gives the expected return per
+    credit bet. variant is a Variant or variant name (default Jacks or Better 9/6).
+    """
+    variant = get_variant(variant)
+    order = sorted(range(5), key=lambda i: codes[i])
+    rank_totals = _rank_totals(tuple(codes[i] >> 2 for i in order), variant)
+
+    # Unseen card primes per suit, for the flush corrections below. Wild cards
+    # fit every suit; a draw always has a natural card, since five wild cards
+    # cannot exist, so each flush is still counted in exactly one suit.
+    dealt = set(codes)
+    wild = variant.is_wild
+    suited_primes = [tuple(RANK_PRIMES[rank] for rank in range(13)
+                           if rank * 4 + suit not in dealt and not wild(rank * 4 + suit))
+                     + tuple(CARD_PRIME[code] for code in range(52) if wild(code) and code not in dealt)
+                     for suit in range(4)]
+
+    totals = [0] * 32
+    for sorted_mask in range(32):
+        held = [codes[order[i]] for i in range(5) if sorted_mask >> i & 1]
+        mask = 0
+        for i in range(5):
+            if sorted_mask >> i & 1:
+                mask |= 1 << order[i]
+        total = rank_totals[sorted_mask]
+
+        # Draws that complete a flush: all five cards in one suit
+        held_suits = {code & 3 for code in held if not wild(code)}
+        if len(held_suits) <= 1:
+            held_key = 2
+            for code in held:
+                held_key *= CARD_PRIME[code]
+            for suit in held_suits or range(4):
+                total += _flush_total(held_key, suited_primes[suit], 5 - len(held), variant)
+        totals[mask] = total
+    return totals
+
+
+def hold_evs(codes: Sequence[int], variant=None) -> List[float]:
+    """Expected return per credit bet for each of the 32 hold masks"""
+    totals = hold_totals(codes, variant)
+    return [totals[mask] / DRAW_COMBINATIONS[5 - bin(mask).count('1')] for mask in range(32)]
+
+
+def best_hold(codes: Sequence[int], variant=None) -> Tuple[int, float]:
+    """Hold mask with the highest expected return, and that expected return"""
+    evs = hold_evs(codes, variant)
+    mask = max(range(32), key=evs.__getitem__)
+    return mask, evs[mask]
+
+
+def optimal_hold(hand, variant=None) -> int:
+    """Optimal hold mask for a dealt hand of Card objects (PokerGame.hand)"""
+    return best_hold([card.code for card in hand], variant)[0]
+
+
+def brute_force_totals(codes: Sequence[int], variant=None) -> List[int]:
+    """Reference for hold_totals: score every draw of every hold with the variant's classifier.
+
+    Independent of the lookup tables and of the counting above, and about
+    2.6 million draws per hand, so it takes seconds.
+    """
+    variant = get_variant(variant)
+    wild = [variant.is_wild(code) for code in range(52)]
+    payouts = {}  # (sorted ranks, natural cards share a suit) -> payout multiplier
+    unseen = [code for code in range(52) if code not in codes]
+    totals = [0] * 32
+    for mask in range(32):
+        held = [codes[i] for i in range(5) if mask >> i & 1]
+        total = 0
+        for draw in itertools.combinations(unseen, 5 - len(held)):
+            hand = held + list(draw)
+            key = (tuple(sorted(code >> 2 for code in hand)), len({code & 3 for code in hand if not wild[code]}) == 1)
+            payout = payouts.get(key)
+            if payout is None:
+                payout = payouts[key] = variant.payouts[variant.classify(*key)]
+            total += payout
+        totals[mask] = total
+    return totals
+
+
+def verify_brute_force(hands_per_variant: int = 2, seed: int = 0) -> int:
+    """Check hold_totals and best_hold against brute_force_totals on random hands of every variant.
+
+    Returns the number of hands checked and raises AssertionError on the first mismatch.
+    """
+    import random
+    from .variants import VARIANT_DEFINITIONS
+    rng = random.Random(seed)
+    checked = 0
+    for name in VARIANT_DEFINITIONS:
+        wild_cards = [code for code in range(52) if get_variant(name).is_wild(code)]
+        for i in range(hands_per_variant):
+            codes = rng.sample(range(52), 5)
+            if i == 0 and wild_cards and not set(codes) & set(wild_cards):
+                codes[0] = rng.choice(wild_cards)  # Make sure wild cards are covered
+            expected = brute_force_totals(codes, name)
+            actual = hold_totals(codes, name)
+            if actual != expected:
+                mask = next(mask for mask in range(32) if actual[mask] != expected[mask])
+                raise AssertionError(f"{name} {codes} hold {mask:05b}: solver gives {actual[mask]}, "
+                                     f"brute force {expected[mask]}")
+            evs = [expected[mask] / DRAW_COMBINATIONS[5 - bin(mask).count('1')] for mask in range(32)]
+            if best_hold(codes, name)[1] != max(evs):
+                raise AssertionError(f"{name} {codes}: best_hold misses the best EV {max(evs)}")
+            checked += 1
+    return checked
+
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    total = verify_brute_force()
+    print(f"Verified {total} hands against brute force in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,143 @@
+import math
+from typing import Dict, Optional, Sequence
+
+# Two-sided 95% normal quantile
+Z_95 = 1.959963984540054
+
+
+class SessionStats:
+    """Constant-memory streaming statistics of played hands.
+
+    Tracks the per-hand return (payout / bet) with Welford's online mean and
+    variance, a histogram of payouts, per-hand-type counts and the bet/win
+    totals. Accumulators from separate workers combine exactly with merge(),
+    so sharded runs report the same statistics as one long run.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0  # Mean return per credit bet
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.total_bet = 0
+        self.total_won = 0
+        self.payouts: Dict[int, int] = {}  # Payout amount -> number of hands
+        self.hand_types: Dict[str, int] = {}
+
+    def add(self, bet: int, payout: int, hand_type: Optional[str] = None):
+        """Record one hand"""
+        self.count += 1
+        x = payout / bet
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.total_bet += bet
+        self.total_won += payout
+        self.payouts[payout] = self.payouts.get(payout, 0) + 1
+        if hand_type is not None:
+            self.hand_types[hand_type] = self.hand_types.get(hand_type, 0) + 1
+
+    def add_array(self, payouts, bet: int, categories=None, hand_names: Optional[Sequence[str]] = None):
+        """Record many hands with the same bet at once (numpy arrays, e.g. from game.batch)"""
+        import numpy as np
+        n = len(payouts)
+        if n == 0:
+            return
+        x = np.asarray(payouts, dtype=np.float64) / bet
+        chunk = SessionStats()
+        chunk.count = n
+        chunk.mean = float(x.mean())
+        chunk.m2 = float(((x - chunk.mean) ** 2).sum())
+        chunk.total_bet = n * bet
+        chunk.total_won = int(np.sum(payouts))
+        values, counts = np.unique(payouts, return_counts=True)
+        chunk.payouts = {int(v): int(c) for v, c in zip(values, counts)}
+        if categories is not None:
+            counts = np.bincount(categories, minlength=len(hand_names))
+            chunk.hand_types = {hand_names[c]: int(k) for c, k in enumerate(counts) if k}
+        self.merge(chunk)
+
+    def merge(self, other: 'SessionStats') -> 'SessionStats':
+        """Fold another accumulator into this one (Chan et al.'s parallel update)"""
+        if other.count:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+            self.mean += delta * other.count / count
+            self.count = count
+            self.total_bet += other.total_bet
+            self.total_won += other.total_won
+            for payout, n in other.payouts.items():
+                self.payouts[payout] = self.payouts.get(payout, 0) + n
+            for hand_type, n in other.hand_types.items():
+                self.hand_types[hand_type] = self.hand_types.get(hand_type, 0) + n
+        return self
+
+    @property
+    def rtp(self) -> float:
+        """Total won over total bet"""
+        return self.total_won / self.total_bet if self.total_bet else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the per-hand return"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std_dev(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def std_error(self) -> float:
+        """Standard error of the mean return per credit bet"""
+        return math.sqrt(self.variance / self.count) if self.count > 1 else math.inf
+
+    def ci_half_width(self, z: float = Z_95) -> float:
+        return z * self.std_error
+
+    def rtp_ci(self, z: float = Z_95):
+        """Confidence interval (95% by default) of the return per credit bet"""
+        half_width = self.ci_half_width(z)
+        return self.mean - half_width, self.mean + half_width
+
+    def precise_enough(self, half_width: float, min_hands: int = 1000) -> bool:
+        """True once the 95% CI half-width of the return is below half_width"""
+        return self.count >= min_hands and self.ci_half_width() < half_width
+
+    def state(self) -> Dict:
+        """Exact accumulator state as JSON-compatible values, restored by from_state()"""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'total_bet': self.total_bet,
+            'total_won': self.total_won,
+            'payouts': sorted(self.payouts.items()),
+            'hand_types': dict(self.hand_types),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'SessionStats':
+        stats = cls()
+        stats.count = state['count']
+        stats.mean = state['mean']
+        stats.m2 = state['m2']
+        stats.total_bet = state['total_bet']
+        stats.total_won = state['total_won']
+        stats.payouts = {payout: n for payout, n in state['payouts']}
+        stats.hand_types = dict(state['hand_types'])
+        return stats
+
+    def to_dict(self) -> Dict:
+        low, high = self.rtp_ci()
+        return {
+            'hands': self.count,
+            'total_bet': self.total_bet,
+            'total_won': self.total_won,
+            'rtp': self.rtp,
+            'mean_return': self.mean,
+            'std_dev': self.std_dev,
+            'std_error': self.std_error,
+            'rtp_ci95': [low, high],
+            'payouts': dict(sorted(self.payouts.items())),
+            'hand_types': dict(self.hand_types),
+        }
@@ -0,0 +1,491 @@
+import re
+import sys
+import time
+import argparse
+import numpy as np
+from collections import Counter
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from .logger import game_logger
+from .evaluator import RANKS
+from .variants import DEFAULT_VARIANT, VARIANT_DEFINITIONS, Variant, get_variant
+from .strategy_table import canonical_hand
+from .rtp import DRAW_COMBINATIONS, HELD_COUNT, TOTAL_DEALS, analyze
+
+DISCARD_ALL = "Discard Everything"
+
+# Rank bitmasks of the ten straights (ace-low first) and of the royal ranks 10-A
+_STRAIGHT_MASKS = [0b1000000001111] + [0b11111 << low for low in range(9)]
+_ROYAL_MASK = 0b11111 << 8
+_DETAILS = re.compile(r" \([^)]*\)")
+
+
+def hold_key(codes: Sequence[int]) -> int:
+    """Key of a set of held cards that is the same for every relabelling of suits:
+    the 13-bit rank mask of each suit, sorted and packed into one integer"""
+    masks = [0, 0, 0, 0]
+    for code in codes:
+        masks[code & 3] |= 1 << (code >> 2)
+    masks.sort(reverse=True)
+    return masks[0] << 39 | masks[1] << 26 | masks[2] << 13 | masks[3]
+
+
+def _key_cards(key: int) -> List[int]:
+    # Representative cards of a hold key: suit i holds the i-th largest rank mask
+    codes = []
+    for suit in range(4):
+        mask = key >> (39 - 13 * suit) & 0x1fff
+        codes.extend(rank * 4 + suit for rank in range(13) if mask >> rank & 1)
+    return codes
+
+
+class _Naming:
+    """What the hold names of a variant need to know about its paytable"""
+
+    def __init__(self, variant: Variant):
+        naturals = [rank for rank in range(13) if rank != variant.wild_rank]
+        # Ranks whose pair pays on its own, with three unrelated kickers in other suits
+        self.high_ranks = set()
+        for rank in naturals:
+            kickers = [k for k in (1, 5, 9, 3, 7) if k != rank and k != variant.wild_rank][:3]
+            codes = [rank * 4, rank * 4 + 1] + [k * 4 + 2 + i % 2 for i, k in enumerate(kickers)]
+            if variant.evaluate(codes):
+                self.high_ranks.add(rank)
+        # Ranks grouped by the category of their four of a kind, e.g. "Four Aces" / "Four 5-K"
+        self.quad_names = {}
+        for rank in naturals:
+            kicker = next(k for k in (7, 8) if k != rank)
+            self.quad_names[rank] = variant.hand_names[variant.evaluate([rank * 4 + suit for suit in range(4)]
+                                                                        + [kicker * 4])]
+        self.grouped = len(set(self.quad_names.values())) > 1
+        self.wild_name = "Deuce" if variant.wild_rank == 0 else "Wild Card"
+
+    def group(self, rank: int) -> str:
+        # "Four Aces" -> "Aces", "Four of a Kind" -> "of a Kind"
+        name = self.quad_names[rank]
+        return name[5:] if name.startswith("Four ") else name
+
+
+@lru_cache(maxsize=None)
+def _naming(variant: Variant) -> _Naming:
+    return _Naming(variant)
+
+
+def _letters(ranks: Sequence[int]) -> str:
+    return "".join('T' if rank == 8 else RANKS[rank] for rank in ranks)
+
+
+def _ways(straights: Sequence[int]) -> str:
+    # Number of straights the held ranks fit in
+    return f"{len(straights)} Way{'s' if len(straights) > 1 else ''}"
+
+
+def describe_hold(codes: Sequence[int], variant=None) -> str:
+    """Strategy-chart name of holding these cards, e.g. "4 to a Royal Flush", "Low Pair" or
+    "3 Unsuited High Cards (KQJ)".
+
+    The name depends only on the held cards (up to a relabelling of suits), so a
+    ranked list of names is a complete strategy.
+    """
+    variant = get_variant(variant)
+    naming = _naming(variant)
+    if not codes:
+        return DISCARD_ALL
+    if len(codes) == 5:
+        category = variant.evaluate(codes)
+        return "Made " + variant.hand_names[category] if category else "Five Cards, No Win"
+
+    wilds = sum(1 for code in codes if variant.is_wild(code))
+    naturals = [code for code in codes if not variant.is_wild(code)]
+    with_wilds = f" with {wilds} {naming.wild_name}{'s' if wilds > 1 else ''}" if wilds else ""
+    if not naturals:
+        return f"{wilds} {naming.wild_name}{'s' if wilds > 1 else ''}"
+    ranks = sorted((code >> 2 for code in naturals), reverse=True)
+    held = len(codes)
+
+    counts = Counter(ranks)
+    if len(counts) < len(ranks):
+        (top_rank, top_count), *rest = sorted(counts.items(), key=lambda item: (-item[1], -item[0]))
+        kickers = sum(1 for _, count in rest if count == 1)
+        if top_count == 4:
+            name = naming.quad_names[top_rank]
+        elif top_count == 3:
+            name = "Three " + naming.group(top_rank)
+        elif rest and rest[0][1] == 2:
+            name = "Two Pair"
+        else:
+            name = "High Pair" if top_rank in naming.high_ranks else "Low Pair"
+            if naming.grouped:
+                name += f" ({naming.group(top_rank)})"
+        if kickers:
+            name += f" + {kickers} Kicker{'s' if kickers > 1 else ''}"
+        return name + with_wilds
+
+    suited = len({code & 3 for code in naturals}) == 1
+    rank_mask = 0
+    for rank in ranks:
+        rank_mask |= 1 << rank
+    straights = [mask for mask in _STRAIGHT_MASKS if rank_mask & mask == rank_mask]
+    high = sum(1 for rank in ranks if rank in naming.high_ranks)
+    high_text = f", {high} High" if naming.high_ranks else ""
+    if suited and straights and held >= 2:
+        if rank_mask & _ROYAL_MASK == rank_mask:
+            if held == 2 and not wilds:
+                return f"2 to a Royal Flush ({_letters(ranks)})"
+            return f"{held} to a Royal Flush{with_wilds}"
+        return f"{held} to a Straight Flush ({_ways(straights)}{high_text}){with_wilds}"
+    if suited and held >= 3:
+        return f"{held} to a Flush ({high} High){with_wilds}" if naming.high_ranks else f"{held} to a Flush{with_wilds}"
+    if straights and held == 4:
+        # Ranks that complete the straight: two for an open-ended draw, one for a gutshot
+        outs = set()
+        for mask in straights:
+            outs.update(rank for rank in range(13) if mask >> rank & 1 and not rank_mask >> rank & 1)
+        kind = "Outside" if len(outs) > 1 else "Inside"
+        return f"4 to an {kind} Straight{' (%d High)' % high if naming.high_ranks else ''}{with_wilds}"
+    if not wilds and high == len(ranks):
+        if held == 1:
+            return f"Single High Card ({_letters(ranks)})"
+        return f"{held} {'Suited' if suited else 'Unsuited'} High Cards ({_letters(ranks)})"
+    if straights and held == 3:
+        return f"3 to a Straight ({_ways(straights)}{high_text}){with_wilds}"
+    if held == 1:
+        return "Single Low Card" + with_wilds
+    return f"{held} {'Suited' if suited else 'Unsuited'} Cards{' (%d High)' % high if naming.high_ranks else ''}" \
+           f"{with_wilds}"
+
+
+def hold_names(codes: Sequence[int], variant=None) -> Tuple[str, ...]:
+    """Names a rule can use for a hold: describe_hold's, and the same without the
+    details in parentheses (e.g. "4 to a Flush (2 High)" and "4 to a Flush")"""
+    name = describe_hold(codes, variant)
+    general = _DETAILS.sub("", name)
+    return (name, general) if general != name else (name,)
+
+
+class RuleStrategy:
+    """A ranked hold-priority list played as a strategy.
+
+    Every hold of the dealt hand is named with hold_names, and the hold with a
+    name nearest the top of the list is played (ties go to the first hold in
+    canonical card order, exactly as compile_rules scores the list). Hands are
+    reduced to their suit-isomorphic class first and the decision is kept per
+    class, so once warm a decision is one canonicalization and a dict lookup.
+    Called with a dealt hand of Card objects, it is a drop-in strategy for
+    test_endurance.simulate_game.
+    """
+
+    def __init__(self, rules: Sequence[str], variant=None):
+        self.variant = get_variant(variant)
+        self.rules = list(rules)
+        if DISCARD_ALL not in self.rules:
+            self.rules.append(DISCARD_ALL)
+        self.priority = {name: i for i, name in enumerate(self.rules)}
+        self._names: Dict[int, Tuple[str, ...]] = {}  # Hold key -> hold_names
+        self._holds: Dict[int, int] = {}  # Class index -> hold mask over the canonical hand
+
+    @classmethod
+    def load(cls, path: str, variant=None) -> 'RuleStrategy':
+        """Read a rule list written by save(); the variant defaults to the one it was compiled for"""
+        rules = []
+        file_variant = None
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('# variant:'):
+                    file_variant = line.split(':', 1)[1].strip()
+                elif line and not line.startswith('#'):
+                    rules.append(line)
+        if variant is not None and file_variant is not None and get_variant(variant).name != file_variant:
+            raise ValueError(f"{path} was compiled for {file_variant}, not {get_variant(variant).name}")
+        return cls(rules, variant or file_variant)
+
+    def save(self, path: str, comments: Sequence[str] = ()):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# variant: {self.variant.name}\n")
+            for comment in comments:
+                f.write(f"# {comment}\n")
+            f.writelines(f"{rule}\n" for rule in self.rules)
+
+    def _priority_of(self, key: int) -> int:
+        # Position of the hold's best-placed name in the list
+        names = self._names.get(key)
+        if names is None:
+            names = self._names[key] = hold_names(_key_cards(key), self.variant)
+        unlisted = len(self.rules)
+        return min(self.priority.get(name, unlisted) for name in names)
+
+    def match(self, hand: Sequence[int]) -> int:
+        """Hold mask chosen by the rules for a hand of card codes, without canonicalizing"""
+        best, best_priority = 0, self._priority_of(0)
+        # Per-suit rank masks of every hold, each built from the hold without its lowest card
+        suit_masks = [[0, 0, 0, 0]] * 32
+        for mask in range(1, 32):
+            low = mask & -mask
+            code = hand[low.bit_length() - 1]
+            masks = suit_masks[mask ^ low][:]
+            masks[code & 3] |= 1 << (code >> 2)
+            suit_masks[mask] = masks
+            a, b, c, d = sorted(masks, reverse=True)
+            priority = self._priority_of(a << 39 | b << 26 | c << 13 | d)
+            if priority < best_priority:
+                best, best_priority = mask, priority
+        return best
+
+    def hold(self, codes: Sequence[int]) -> int:
+        """Hold mask (bit i holds card i) for a dealt hand of card codes"""
+        index, order, hand = canonical_hand(codes)
+        canonical_mask = self._holds.get(index)
+        if canonical_mask is None:
+            canonical_mask = self._holds[index] = self.match(hand)
+        mask = 0
+        for i in range(5):
+            if canonical_mask >> i & 1:
+                mask |= 1 << order[i]
+        return mask
+
+    def __call__(self, hand) -> int:
+        return self.hold([card.code for card in hand])
+
+
+class _RuleSearch:
+    """Every (deal class, hold name) pair of a variant with the EV of its first hold,
+    and the ordering of names into the rule list that loses the least EV.
+
+    A rule list plays, in each class, the listed name that comes first; so moving
+    one name only changes the classes that contain it, and for those the best
+    new position follows from where each class's next-best name sits. That makes
+    a best-insertion pass over all names cheap enough to repeat until it
+    converges.
+    """
+
+    def __init__(self, analysis: Dict, variant: Variant):
+        hands = analysis['class_hands'].astype(np.int64)
+        self.weights = analysis['class_weights'].astype(np.float64)
+        self.totals = analysis['hold_totals']
+        evs = self.totals / DRAW_COMBINATIONS[5 - HELD_COUNT]
+        self.optimal = evs.max(axis=1)
+        n = len(hands)
+
+        # Hold key of all 32 holds of every class
+        suit_bits = (hands[:, :, None] & 3) == np.arange(4)
+        card_masks = suit_bits.astype(np.int64) << (hands[:, :, None] >> 2)  # (n, 5, 4)
+        keys = np.empty((n, 32), dtype=np.int64)
+        for mask in range(32):
+            held = [i for i in range(5) if mask >> i & 1]
+            suit_masks = -np.sort(-card_masks[:, held].sum(axis=1), axis=1)
+            keys[:, mask] = suit_masks[:, 0] << 39 | suit_masks[:, 1] << 26 | suit_masks[:, 2] << 13 | suit_masks[:, 3]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        key_names = [hold_names(_key_cards(int(key)), variant) for key in unique_keys]
+        self.names = sorted({name for names in key_names for name in names})
+        name_ids = {name: i for i, name in enumerate(self.names)}
+        # Name ids of every hold: its own name, then its general name (or its own again)
+        patterns = np.array([[name_ids[names[0]], name_ids[names[-1]]] for names in key_names],
+                            dtype=np.int64)[inverse.reshape(n, 32)]
+        self.discard = name_ids[DISCARD_ALL]
+
+        # One entry per (class, name): the first hold with that name, grouped by class
+        count = len(self.names)
+        combined = (np.arange(n)[:, None, None] * count + patterns).ravel()
+        _, first = np.unique(combined, return_index=True)
+        self.entry_class = first // 64
+        self.entry_mask = first % 64 // 2
+        self.entry_name = patterns.ravel()[first]
+        self.entry_ev = evs[self.entry_class, self.entry_mask]
+        self.class_starts = np.flatnonzero(np.r_[True, self.entry_class[1:] != self.entry_class[:-1]])
+        by_name = np.argsort(self.entry_name, kind='stable')
+        bounds = np.searchsorted(self.entry_name[by_name], np.arange(count + 1))
+        self.name_entries = [by_name[bounds[i]:bounds[i + 1]] for i in range(count)]
+        self.mean_ev = np.array([np.average(self.entry_ev[e], weights=self.weights[self.entry_class[e]])
+                                 for e in self.name_entries])
+        self.order: List[int] = []
+
+    def set_order(self, order: Sequence[int]):
+        """Score a rule list: which name, and which runner-up, decides every class"""
+        self.order = list(order)
+        count = len(self.names)
+        unlisted = count + 1
+        self.position = np.full(count, unlisted, dtype=np.int64)
+        self.position[self.order] = np.arange(len(self.order))
+        entry_position = self.position[self.entry_name]
+        self.first_position = np.minimum.reduceat(entry_position, self.class_starts)
+        is_first = entry_position == self.first_position[self.entry_class]
+        self.first_name = self.entry_name[is_first]
+        self.first_ev = self.entry_ev[is_first]
+        self.first_mask = self.entry_mask[is_first]
+        entry_position = np.where(is_first, unlisted, entry_position)
+        self.second_position = np.minimum.reduceat(entry_position, self.class_starts)
+        is_second = (entry_position == self.second_position[self.entry_class]) & (entry_position < unlisted)
+        self.second_ev = np.zeros(len(self.class_starts))
+        self.second_ev[self.entry_class[is_second]] = self.entry_ev[is_second]
+
+    def ev_lost(self) -> float:
+        """EV lost per credit bet against optimal play, averaged over all deals"""
+        return float(self.weights @ (self.optimal - self.first_ev)) / TOTAL_DEALS
+
+    def best_insertion(self, name: int) -> bool:
+        """Move one name to its best position in the list, or out of it; returns True if it moved"""
+        entries = self.name_entries[name]
+        classes = self.entry_class[entries]
+        decides = self.first_name[classes] == name
+        other_position = np.where(decides, self.second_position[classes], self.first_position[classes])
+        other_ev = np.where(decides, self.second_ev[classes], self.first_ev[classes])
+        listed = name in self.order
+        current = self.order.index(name) if listed else None
+        if listed:
+            other_position = other_position - (other_position > current)
+        length = len(self.order) - listed
+        gains = np.bincount(other_position, weights=self.weights[classes] * (self.entry_ev[entries] - other_ev),
+                            minlength=length)[:length]
+        # gain[i]: total EV gained by inserting the name before the rule now at i (at most before DISCARD_ALL)
+        gain = np.cumsum(gains[::-1])[::-1]
+        best = int(np.argmax(gain))
+        current_gain = gain[current] if listed else 0.0
+        order = [rule for rule in self.order if rule != name]
+        if gain[best] > max(current_gain, 0.0) + 1e-6:
+            order.insert(best, name)
+        elif not (listed and current_gain < -1e-6):
+            return False
+        # Otherwise the rule only ever plays worse holds than the rules below it: drop it
+        self.set_order(order)
+        return True
+
+    def optimize(self, max_passes: int = 50):
+        """Best-insertion passes over the listed names until none moves.
+
+        Names that never decide a class still matter: they are the runner-up
+        that takes over when a name above them is moved or dropped. So unused
+        names are dropped and the passes repeated until the list is stable.
+        """
+        for _ in range(max_passes):
+            moved = False
+            for name in list(self.order):
+                if name != self.discard:
+                    moved |= self.best_insertion(name)
+            if not moved and not self.drop_unused():
+                break
+
+    def removal_costs(self) -> np.ndarray:
+        """EV (weighted by deals) lost by dropping each name from the list"""
+        return np.bincount(self.first_name, weights=self.weights * (self.first_ev - self.second_ev),
+                           minlength=len(self.names))
+
+    def drop_unused(self) -> bool:
+        """Drop the names that decide no class; returns True if any were listed"""
+        used = set(self.first_name.tolist())
+        order = [name for name in self.order if name in used or name == self.discard]
+        if len(order) == len(self.order):
+            return False
+        self.set_order(order)
+        return True
+
+    def prune(self, length: int, curve: Optional[List] = None):
+        """Drop the cheapest rule and reorder, until the list is length rules long.
+
+        With curve, (length, EV lost) is appended for every length passed through.
+        """
+        while len(self.order) > max(length, 1):
+            costs = self.removal_costs()
+            name = min((n for n in self.order if n != self.discard), key=costs.__getitem__)
+            self.set_order([n for n in self.order if n != name])
+            self.optimize()
+            if curve is not None:
+                curve.append((len(self.order), self.ev_lost()))
+
+    def exact_return(self) -> Fraction:
+        """Exact return per credit of the current list over all deals"""
+        classes = np.arange(len(self.class_starts))
+        totals = self.totals[classes, self.first_mask]
+        drawn = 5 - HELD_COUNT[self.first_mask]
+        weighted = self.weights.astype(np.int64) * totals
+        return sum(Fraction(int(weighted[drawn == m].sum()), int(DRAW_COMBINATIONS[m])) for m in range(6)) \
+            / TOTAL_DEALS
+
+
+def compile_rules(variant=None, payouts: Optional[Sequence[int]] = None, max_rules: Optional[int] = None,
+                  analysis: Optional[Dict] = None) -> Dict:
+    """Derive a ranked hold-priority list from the exact EVs of every deal.
+
+    Holds are named with describe_hold, the names are ordered to lose the least
+    EV against optimal play, and names that never decide a deal are dropped.
+    Shorter lists come from repeatedly dropping the rule whose loss costs least
+    and reordering; with max_rules the list is cut to at most that many rules
+    (DISCARD_ALL included).
+
+    Returns the RuleStrategy, its exact return and EV lost per credit (as
+    Fractions and floats), the share of deals it misplays, and 'curve': the
+    (length, EV lost) of every shorter list.
+    """
+    start = time.perf_counter()
+    variant = get_variant(variant)
+    if analysis is None:
+        analysis = analyze(variant, payouts, keep_holds=True)
+    search = _RuleSearch(analysis, variant)
+    # Start from the names in decreasing order of their mean EV, then improve by best insertion
+    order = [name for name in np.argsort(-search.mean_ev, kind='stable') if name != search.discard]
+    search.set_order([int(name) for name in order] + [search.discard])
+    search.optimize()
+    full = list(search.order)
+
+    # Shorter lists: the full list cut down one rule at a time
+    curve = [(len(full), search.ev_lost())]
+    lists = {len(full): full}
+    while len(search.order) > 1:
+        search.prune(len(search.order) - 1)
+        curve.append((len(search.order), search.ev_lost()))
+        lists[len(search.order)] = list(search.order)
+    if max_rules is not None and max_rules < len(full):
+        # Optimizing can drop more than one rule at a time, so take the longest list that fits
+        search.set_order(lists[max(length for length in lists if length <= max(max_rules, 1))])
+    else:
+        search.set_order(full)
+
+    rtp = search.exact_return()
+    ev_lost = analysis['rtp_exact'] - rtp
+    misplayed = float(search.weights[search.first_ev < search.optimal - 1e-12].sum()) / TOTAL_DEALS
+    strategy = RuleStrategy([search.names[name] for name in search.order], variant)
+    game_logger.summary("Compiled %d rules for %s paytable %s in %.1fs: EV lost %.6f%%", len(strategy.rules),
+                        variant.name, analysis['payouts'], time.perf_counter() - start, float(ev_lost) * 100)
+    return {
+        'strategy': strategy,
+        'rules': strategy.rules,
+        'rtp': float(rtp),
+        'rtp_exact': rtp,
+        'optimal_rtp': analysis['rtp'],
+        'ev_lost': float(ev_lost),
+        'ev_lost_exact': ev_lost,
+        'misplayed': misplayed,
+        'curve': curve,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile exact EVs into a ranked hold-priority rule list")
+    parser.add_argument('payouts', nargs='*', type=int,
+                        help="multipliers for each hand category of the variant (default: its own paytable)")
+    parser.add_argument('--variant', choices=list(VARIANT_DEFINITIONS), default=DEFAULT_VARIANT)
+    parser.add_argument('--max-rules', type=int, help="cut the list to this many rules")
+    parser.add_argument('--output', help="write the rule list to this file (play it with test_endurance.py --rules)")
+    args = parser.parse_args(argv)
+    variant = get_variant(args.variant)
+    if args.payouts and len(args.payouts) != len(variant.hand_names):
+        parser.error(f"expected {len(variant.hand_names)} payouts for {', '.join(variant.hand_names)}, "
+                     f"got {len(args.payouts)}")
+
+    result = compile_rules(variant, args.payouts, args.max_rules)
+    for i, rule in enumerate(result['rules'], 1):
+        print(f"{i:>3}. {rule}")
+    print(f"\n{len(result['rules'])} rules: return {result['rtp'] * 100:.6f}% vs {result['optimal_rtp'] * 100:.6f}% "
+          f"optimal, EV lost {result['ev_lost'] * 100:.6f}% of the bet ({result['misplayed']:.4%} of deals misplayed)")
+    print("EV lost by list length (dropping the cheapest rule each time):")
+    for length, ev_lost in result['curve']:
+        if length <= 60 and (length <= 10 or length % 5 == 0) or length == result['curve'][0][0]:
+            print(f"  {length:>3} rules: {ev_lost * 100:.6f}%")
+    if args.output:
+        result['strategy'].save(args.output, [f"payouts: {args.payouts or variant.payouts}",
+                                              f"EV lost vs optimal: {result['ev_lost'] * 100:.6f}% of the bet"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
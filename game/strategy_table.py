@@ -0,0 +1,188 @@
+import os
+import sys
+import mmap
+import time
+import struct
+from array import array
+from bisect import bisect_left
+from math import comb
+from typing import Dict, List, Optional, Sequence, Tuple
+from .logger import game_logger
+from .variants import DEFAULT_VARIANT, VARIANT_DEFINITIONS, get_variant
+from . import solver
+
+# File layout: 48-byte header, then three parallel sections sorted by class index:
+#   uint32 canonical class index, float32 EV of the optimal hold, uint8 optimal hold mask
+MAGIC = b'JOBS'
+VERSION = 2
+HEADER = struct.Struct('<4sHHII32s')  # magic, version, reserved, class count, reserved, variant name
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+
+
+def default_path(variant=None) -> str:
+    """Where the table of a variant is built and looked for"""
+    return os.path.join(DATA_DIR, f'strategy_{get_variant(variant).name}.bin')
+
+
+DEFAULT_PATH = default_path(DEFAULT_VARIANT)
+
+# Number of suit-isomorphic classes of 5-card deals
+CANONICAL_CLASSES = 134459
+
+# COLEX[i][code] = comb(code, i + 1): colexicographic index terms for a sorted 5-card hand
+COLEX = [[comb(code, i + 1) for code in range(52)] for i in range(5)]
+
+
+def canonical_hand(codes: Sequence[int]) -> Tuple[int, List[int], List[int]]:
+    """Reduce a hand to its suit-isomorphic class.
+
+    Suits are relabelled in decreasing order of the rank bitmask they hold, which
+    makes the relabelled hand the same for every suit permutation. Returns the
+    colex index of the relabelled, sorted hand, the original position of each
+    card in that sorted order, and the relabelled, sorted hand itself.
+    """
+    masks = [0, 0, 0, 0]
+    for code in codes:
+        masks[code & 3] |= 1 << (code >> 2)
+    labels = [0, 0, 0, 0]
+    for label, suit in enumerate(sorted(range(4), key=masks.__getitem__, reverse=True)):
+        labels[suit] = label
+    canonical = [(code & ~3) | labels[code & 3] for code in codes]
+    order = sorted(range(5), key=canonical.__getitem__)
+    hand = [canonical[i] for i in order]
+    index = COLEX[0][hand[0]] + COLEX[1][hand[1]] + COLEX[2][hand[2]] + COLEX[3][hand[3]] + COLEX[4][hand[4]]
+    return index, order, hand
+
+
+def canonicalize(codes: Sequence[int]) -> Tuple[int, List[int]]:
+    """Colex index of a hand's suit-isomorphic class, and the original position of
+    each card in canonical sorted order (see canonical_hand)"""
+    index, order, _ = canonical_hand(codes)
+    return index, order
+
+
+class StrategyTable:
+    """Read-only, memory-mapped optimal strategy table.
+
+    The file is mapped rather than read, so every process that opens the same
+    table shares one copy of its pages.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, _, variant = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} strategy table")
+        self.count = count
+        self.variant = variant.rstrip(b'\0').decode('ascii')
+        view = memoryview(self.mm)
+        keys_end = HEADER.size + 4 * count
+        evs_end = keys_end + 4 * count
+        self.keys = view[HEADER.size:keys_end].cast('I')
+        self.evs = view[keys_end:evs_end].cast('f')
+        self.masks = view[evs_end:evs_end + count]
+
+    def lookup(self, codes: Sequence[int]) -> Tuple[int, float]:
+        """Optimal hold mask (bit i holds card i) and its expected return per credit bet"""
+        index, order = canonicalize(codes)
+        slot = bisect_left(self.keys, index)
+        if slot == self.count or self.keys[slot] != index:
+            raise KeyError(f"Hand class {index} missing from {self.path}")
+        canonical_mask = self.masks[slot]
+        mask = 0
+        for i in range(5):
+            if canonical_mask >> i & 1:
+                mask |= 1 << order[i]
+        return mask, self.evs[slot]
+
+    def close(self):
+        self.keys.release()
+        self.evs.release()
+        self.masks.release()
+        self.mm.close()
+
+
+def build(path: Optional[str] = None, variant=None, payouts: Optional[Sequence[int]] = None):
+    """Solve every canonical class of a variant exactly and write the table to path.
+
+    path defaults to default_path(variant); payouts override the variant's
+    paytable. Uses the vectorized calculator in game.rtp, which gives the same
+    holds as solver.best_hold (checked class by class) in a fraction of the time.
+    """
+    # Imported here: game.rtp builds on game.batch, which imports this module
+    from .rtp import analyze
+    variant = get_variant(variant)
+    path = path or default_path(variant)
+    start = time.perf_counter()
+    result = analyze(variant, payouts, keep_holds=True)
+    keys = array('I', result['class_keys'].astype('uint32').tobytes())
+    best = result['best_masks']
+    totals = result['hold_totals'][range(len(best)), best]
+    evs = array('f', [total / solver.DRAW_COMBINATIONS[5 - bin(mask).count('1')]
+                      for total, mask in zip(totals.tolist(), best.tolist())])
+    masks = bytearray(best.tobytes())
+    if len(keys) != CANONICAL_CLASSES:
+        raise RuntimeError(f"Expected {CANONICAL_CLASSES} canonical classes, found {len(keys)}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(keys), 0, variant.name.encode('ascii')))
+        f.write(keys.tobytes())
+        f.write(evs.tobytes())
+        f.write(masks)
+    os.replace(tmp_path, path)
+    game_logger.summary("Wrote %d classes to %s in %.1fs", len(keys), path, time.perf_counter() - start)
+
+
+_default_tables: Dict[str, StrategyTable] = {}
+
+
+def get_default_table(variant=None) -> Optional[StrategyTable]:
+    """The table of a variant at its default path, opened on first use; None if it has not been built"""
+    variant = get_variant(variant)
+    table = _default_tables.get(variant.name)
+    if table is None:
+        path = default_path(variant)
+        if not os.path.exists(path):
+            return None
+        table = StrategyTable(path)
+        if table.variant != variant.name:
+            raise ValueError(f"{path} was built for {table.variant}, not {variant.name}")
+        _default_tables[variant.name] = table
+    return table
+
+
+def optimal_hold(hand, variant=None) -> int:
+    """Optimal hold mask for a dealt hand of Card objects, from the table when it is available"""
+    codes = [card.code for card in hand]
+    table = get_default_table(variant)
+    if table is None:
+        return solver.best_hold(codes, variant)[0]
+    return table.lookup(codes)[0]
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Build or inspect the precomputed optimal strategy table")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="solve every canonical class and write the table")
+    build_parser.add_argument('path', nargs='?', help="output file (default: data/strategy_<variant>.bin)")
+    build_parser.add_argument('--variant', choices=list(VARIANT_DEFINITIONS), default=DEFAULT_VARIANT)
+    info_parser = subparsers.add_parser('info', help="print a summary of an existing table")
+    info_parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        build(args.path, args.variant)
+    else:
+        table = StrategyTable(args.path)
+        print(f"{args.path}: {table.variant}, {table.count} classes, {os.path.getsize(args.path)} bytes")
+        table.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
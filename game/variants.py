@@ -0,0 +1,177 @@
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from . import evaluator
+from .evaluator import CARD_PRIME, RANK_INDEX, RANK_PRIMES, rank_multisets
+
+# A classifier maps the sorted rank indices of a 5-card hand, and whether its
+# natural (non-wild) cards share one suit, to an index into the variant's hand names
+Classifier = Callable[[Tuple[int, ...], bool], int]
+
+
+class Variant:
+    """A game variant: its hand categories, paytable and compiled lookup table.
+
+    The table has the same shape as evaluator.CATEGORY_TABLE, keyed by the
+    prime product of the ranks << 1 plus a flush bit. Wild cards carry every
+    suit bit, so the flush bit means "all natural cards share a suit" and
+    scoring stays one lookup however complex the variant is. Compiled on
+    first use and kept for the life of the process.
+    """
+
+    def __init__(self, name: str, title: str, hand_names: List[str], payouts: List[int],
+                 classify: Classifier, wild_rank: Optional[str] = None):
+        if len(hand_names) != len(payouts):
+            raise ValueError(f"{name}: {len(hand_names)} hand names but {len(payouts)} payouts")
+        self.name = name
+        self.title = title
+        self.hand_names = hand_names
+        self.payouts = payouts
+        self.classify = classify
+        self.wild_rank = RANK_INDEX[wild_rank] if wild_rank is not None else None
+        self._category_table = None
+        self._payout_table = None
+        self.suit_bits = [0b1111 if code >> 2 == self.wild_rank else 1 << (code & 3) for code in range(52)]
+
+    def __repr__(self):
+        return f"Variant({self.name!r})"
+
+    def _compile(self):
+        table = {}
+        for ranks in rank_multisets(5):
+            product = 1
+            for rank in ranks:
+                product *= RANK_PRIMES[rank]
+            table[product << 1] = self.classify(ranks, False)
+            naturals = [rank for rank in ranks if rank != self.wild_rank]
+            if len(set(naturals)) == len(naturals):
+                table[(product << 1) | 1] = self.classify(ranks, True)
+        self._category_table = table
+        self._payout_table = {key: self.payouts[category] for key, category in table.items()}
+
+    @property
+    def category_table(self) -> Dict[int, int]:
+        if self._category_table is None:
+            self._compile()
+        return self._category_table
+
+    @property
+    def payout_table(self) -> Dict[int, int]:
+        if self._payout_table is None:
+            self._compile()
+        return self._payout_table
+
+    def hand_key(self, codes: Sequence[int]) -> int:
+        a, b, c, d, e = codes
+        bits = self.suit_bits
+        key = (CARD_PRIME[a] * CARD_PRIME[b] * CARD_PRIME[c] * CARD_PRIME[d] * CARD_PRIME[e]) << 1
+        if bits[a] & bits[b] & bits[c] & bits[d] & bits[e]:
+            key |= 1
+        return key
+
+    def evaluate(self, codes: Sequence[int]) -> int:
+        """Hand category of a 5-card hand given as card codes"""
+        return self.category_table[self.hand_key(codes)]
+
+    def is_wild(self, code: int) -> bool:
+        return code >> 2 == self.wild_rank
+
+
+def _jacks_or_better(ranks, flush):
+    return evaluator.classify_reference(list(ranks), [0] * 5 if flush else [0, 1, 0, 0, 0])
+
+
+def _bonus(ranks, flush):
+    # Four of a kind is split by rank: 5-K, 2-4, aces
+    category = _jacks_or_better(ranks, flush)
+    if category < evaluator.FOUR_OF_A_KIND:
+        return category
+    if category == evaluator.FOUR_OF_A_KIND:
+        quad = ranks[2]
+        return 9 if quad == 12 else 8 if quad <= 2 else 7
+    return category + 2
+
+
+def _double_double_bonus(ranks, flush):
+    # As Bonus Poker, with a bigger pay for aces or 2-4 holding a low kicker
+    category = _jacks_or_better(ranks, flush)
+    if category < evaluator.FOUR_OF_A_KIND:
+        return category
+    if category == evaluator.FOUR_OF_A_KIND:
+        quad = ranks[2]
+        kicker = ranks[0] if ranks[0] != quad else ranks[4]
+        if quad == 12:
+            return 10 if kicker <= 2 else 9
+        if quad <= 2:
+            return 11 if kicker <= 2 or kicker == 12 else 8
+        return 7
+    return category + 4
+
+
+_STRAIGHT_WINDOWS = [set(range(low, low + 5)) for low in range(9)] + [{12, 0, 1, 2, 3}]
+
+
+def _deuces_wild(ranks, flush):
+    wilds = ranks.count(0)
+    naturals = [rank for rank in ranks if rank != 0]
+    counts = sorted(Counter(naturals).values(), reverse=True) or [0]
+    distinct = len(set(naturals)) == len(naturals)
+    straight = distinct and any(set(naturals) <= window for window in _STRAIGHT_WINDOWS)
+    royal = distinct and set(naturals) <= {8, 9, 10, 11, 12}
+
+    if flush and royal and wilds == 0:
+        return 10  # Natural Royal Flush
+    if wilds == 4:
+        return 9  # Four Deuces
+    if flush and royal:
+        return 8  # Wild Royal Flush
+    if counts[0] + wilds == 5:
+        return 7  # Five of a Kind
+    if flush and straight:
+        return 6
+    if counts[0] + wilds == 4:
+        return 5
+    if (wilds == 0 and counts[:2] == [3, 2]) or (wilds == 1 and counts[:2] == [2, 2]):
+        return 4
+    if flush:
+        return 3
+    if straight:
+        return 2
+    if counts[0] + wilds == 3:
+        return 1
+    return 0
+
+
+_JOB_NAMES = list(evaluator.HAND_NAMES)
+_BONUS_NAMES = _JOB_NAMES[:7] + ["Four 5-K", "Four 2-4", "Four Aces", "Straight Flush", "Royal Flush"]
+_DDB_NAMES = _BONUS_NAMES[:10] + ["Four Aces + 2-4", "Four 2-4 + A-4", "Straight Flush", "Royal Flush"]
+_DEUCES_NAMES = ["No Win", "Three of a Kind", "Straight", "Flush", "Full House", "Four of a Kind",
+                 "Straight Flush", "Five of a Kind", "Wild Royal Flush", "Four Deuces", "Natural Royal Flush"]
+
+# name -> (title, hand names, payouts, classifier, wild rank)
+VARIANT_DEFINITIONS = {
+    'jacks-or-better-9-6': ("Jacks or Better", _JOB_NAMES, list(evaluator.PAYOUTS), _jacks_or_better, None),
+    'jacks-or-better-8-5': ("Jacks or Better 8/5", _JOB_NAMES,
+                            [0, 1, 2, 3, 4, 5, 8, 25, 50, 800], _jacks_or_better, None),
+    'bonus-poker': ("Bonus Poker", _BONUS_NAMES,
+                    [0, 1, 2, 3, 4, 5, 8, 25, 40, 80, 50, 800], _bonus, None),
+    'double-double-bonus': ("Double Double Bonus", _DDB_NAMES,
+                            [0, 1, 1, 3, 4, 6, 9, 50, 80, 160, 400, 160, 50, 800], _double_double_bonus, None),
+    'deuces-wild': ("Deuces Wild", _DEUCES_NAMES,
+                    [0, 1, 2, 2, 3, 5, 9, 15, 25, 200, 800], _deuces_wild, '2'),
+}
+DEFAULT_VARIANT = 'jacks-or-better-9-6'
+
+_variants = {}
+
+
+def get_variant(variant=None) -> Variant:
+    """Variant by name (default Jacks or Better 9/6); Variant instances are returned as is"""
+    if isinstance(variant, Variant):
+        return variant
+    name = variant or DEFAULT_VARIANT
+    if name not in _variants:
+        if name not in VARIANT_DEFINITIONS:
+            raise ValueError(f"Unknown variant {name!r}, expected one of {', '.join(VARIANT_DEFINITIONS)}")
+        title, hand_names, payouts, classify, wild_rank = VARIANT_DEFINITIONS[name]
+        _variants[name] = Variant(name, title, hand_names, payouts, classify, wild_rank)
+    return _variants[name]
@@ -1,31 +1,77 @@
 import pygame
 import sys
 import logging
+import argparse
 from game.poker_game import PokerGame
+from game.logger import game_logger
+from game.variants import DEFAULT_VARIANT, VARIANT_DEFINITIONS
+from game.persistence import SessionStore
+from game import metrics
 from ui.game_window import GameWindow
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('video_poker_ui.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
 logger = logging.getLogger('main')
 
+FPS = 30
+# Share of each endurance-mode frame spent playing hands; the rest draws the frame
+ENDURANCE_SLICE_MS = 25
+
 def main():
+    parser = argparse.ArgumentParser(description="Video poker")
+    parser.add_argument('--variant', choices=list(VARIANT_DEFINITIONS), default=DEFAULT_VARIANT)
+    parser.add_argument('--endurance', type=int, metavar='HANDS',
+                        help="auto-play this many hands with the optimal strategy (P or space pauses)")
+    parser.add_argument('--credits', type=int, default=100)
+    parser.add_argument('--log-profile', choices=game_logger.PROFILES,
+                        help="game logging profile (default: simulation with --endurance)")
+    parser.add_argument('--advisor', action='store_true',
+                        help="show the EV of your hold next to the best one, and the EV lost to mistakes (H toggles)")
+    parser.add_argument('--risk', metavar='MODE',
+                        help="variance[:K] or ruin[:HANDS]: the advisor also shows this risk-adjusted hold, "
+                             "and --endurance plays it")
+    parser.add_argument('--save', metavar='PATH',
+                        help="keep the session in this SQLite file and resume it on the next start")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    if args.risk:
+        from game.risk import RiskStrategy
+        try:
+            RiskStrategy.parse(args.risk, args.variant)
+        except ValueError as e:
+            parser.error(str(e))
+
+    # Configure logging when the game starts, not when this module is imported
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('video_poker_ui.log', delay=True),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    if args.log_profile or args.endurance:
+        game_logger.configure(args.log_profile or 'simulation')
+    with metrics.instrumented(args):
+        run(args)
+
+def run(args):
     pygame.init()
     screen_width = 800
     screen_height = 600
     screen = pygame.display.set_mode((screen_width, screen_height))
-    pygame.display.set_caption("Jacks or Better Video Poker")
 
     # Initialize game components
-    game = PokerGame()
-    game_window = GameWindow(screen, game)
+    store = SessionStore(args.save) if args.save else None
+    game = PokerGame(credits=args.credits, variant=args.variant, store=store)
+    if store is not None and store.restore(game):
+        logger.info("Resumed session %d from %s (%s)", game.session_id, args.save, game.game_state)
+    pygame.display.set_caption(f"{game.variant.title} Video Poker")
+    game_window = GameWindow(screen, game, advisor=args.advisor, risk=args.risk)
+    if args.endurance:
+        strategy = None
+        if args.risk:
+            from game.risk import RiskStrategy
+            strategy = RiskStrategy.parse(args.risk, game.variant)
+        game_window.start_endurance(args.endurance, strategy)
 
     # Main game loop
     clock = pygame.time.Clock()
@@ -33,18 +79,28 @@ def main():
     while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if store is not None:
+                    store.close()
                 pygame.quit()
                 sys.exit()
             if game_window.handle_event(event):  # Returns True if event caused state change
                 needs_redraw = True
 
+        # Endurance mode plays hands flat out between frames and shows the latest one
+        if game_window.run_endurance(ENDURANCE_SLICE_MS):
+            needs_redraw = True
+        # Hint EVs are solved off the render thread; redraw when they arrive
+        if game_window.poll_advisor():
+            needs_redraw = True
+
+        if store is not None:
+            store.commit_if_due()  # Save a game left idle mid-hand
+
         if needs_redraw:
-            screen.fill((0, 0, 0))  # Clear screen before drawing
-            game_window.draw()
-            pygame.display.flip()
+            game_window.draw()  # Redraws and updates only what changed
             needs_redraw = False
             
-        clock.tick(30)  # Reduce to 30 FPS since this is a card game
+        clock.tick(FPS)  # Reduce to 30 FPS since this is a card game
 
 if __name__ == "__main__":
     main()
@@ -2,33 +2,62 @@ import os
 import sys
 import time
 import random
+import logging
+import argparse
+import contextlib
+import multiprocessing
+import numpy as np
 from game.poker_game import PokerGame
 from game.logger import game_logger
+from game.batch import simulate_batch
+from game.variants import DEFAULT_VARIANT, VARIANT_DEFINITIONS, get_variant
+from game.history import HandHistoryWriter
+from game.stats import SessionStats
+from game.checkpoint import Checkpoint, rng_state, set_rng_state
+from game import metrics
 
-def should_hold_card(card, hand):
-    """Basic strategy for holding cards"""
-    # Count pairs and potential straights/flushes
-    ranks = [c.rank for c in hand]
-    suits = [c.suit for c in hand]
-    
-    # Always hold pairs of jacks or better
-    if card.rank in ['J', 'Q', 'K', 'A'] and ranks.count(card.rank) >= 2:
-        return True
-    
-    # Always hold three of a kind or better
-    if ranks.count(card.rank) >= 3:
-        return True
-    
-    # Hold high cards (jack or better)
-    if card.rank in ['J', 'Q', 'K', 'A']:
-        return True
-        
-    # Otherwise, don't hold
-    return False
+def _session_results(game, hands_played, starting_credits, min_credits, max_credits, total_bets, total_winnings,
+                     winning_hands, hand_types, stats):
+    return {
+        'hands_played': hands_played,
+        'starting_credits': starting_credits,
+        'final_credits': game.credits,
+        'min_credits': min_credits,
+        'max_credits': max_credits,
+        'total_bets': total_bets,
+        'total_winnings': total_winnings,
+        'winning_hands': winning_hands,
+        'hand_types': hand_types,
+        'stats': stats,
+    }
 
-def simulate_game(num_hands=25):
-    """Run an endurance test of the game without graphical display"""
-    game = PokerGame()
+def _checkpoint_state(game, results, history):
+    """Everything play_session needs to carry on exactly where it stopped"""
+    return dict(results, stats=results['stats'].state(), variant=game.variant.name, deck=game.deck,
+                rng=rng_state(game.rng), history_size=history.tell() if history is not None else None)
+
+def play_session(num_hands=25, strategy=None, rng=None, starting_credits=100, history=None, variant=None,
+                 precision=None, checkpoint=None, resume=False):
+    """Play one session without graphical display and return its statistics.
+
+    strategy takes the dealt hand and returns a hold mask (bit i holds card i);
+    None plays the variant's optimal strategy. A strategy with a bind() method
+    (e.g. game.risk.RiskStrategy) is bound to the game first, so it can read
+    the credits and bet. rng is passed to PokerGame; None
+    uses the global random module. history is an optional HandHistoryWriter
+    that records every hand. With precision, the session stops early once the
+    95% confidence interval of the return is narrower than +/- precision.
+
+    checkpoint is an optional game.checkpoint.Checkpoint that snapshots the
+    session periodically and at the end. With resume, the session continues
+    from its last snapshot (dropping history records written after it) and
+    plays out exactly as an uninterrupted run would have.
+    """
+    game = PokerGame(rng=rng, credits=starting_credits, history=history, variant=variant)
+    if strategy is None:
+        strategy = lambda hand: game.optimal_hold()
+    elif hasattr(strategy, 'bind'):
+        strategy.bind(game)
     
     # Track statistics
     hands_played = 0
@@ -39,48 +68,84 @@ def simulate_game(num_hands=25):
     total_winnings = 0
     winning_hands = 0
     hand_types = {}
+    stats = SessionStats()
+    
+    state = checkpoint.load() if checkpoint is not None and resume else None
+    if state is not None:
+        if state['variant'] != game.variant.name:
+            raise ValueError(f"{checkpoint.path} is a {state['variant']} session, not {game.variant.name}")
+        hands_played = state['hands_played']
+        starting_credits = game.starting_credits = state['starting_credits']
+        game.credits = state['final_credits']
+        min_credits = game.min_credits = state['min_credits']
+        max_credits = game.max_credits = state['max_credits']
+        total_bets = state['total_bets']
+        total_winnings = state['total_winnings']
+        winning_hands = state['winning_hands']
+        hand_types = state['hand_types']
+        stats = SessionStats.from_state(state['stats'])
+        game.deck[:] = state['deck']
+        set_rng_state(game.rng, state['rng'])
+        if history is not None and state['history_size'] is not None:
+            history.truncate(state['history_size'])
+        game_logger.summary("Resuming at hand %d from %s", hands_played, checkpoint.path)
+    elif resume:
+        game_logger.summary("No checkpoint at %s yet, starting from the beginning", checkpoint.path)
     
-    game_logger.info(f"Starting endurance test with {num_hands} hands")
-    game_logger.info(f"Initial credits: {starting_credits}")
+    game_logger.summary("Starting endurance test with %d hands", num_hands)
+    game_logger.summary("Initial credits: %d", starting_credits)
     
     bet_amount = 5  # Fixed bet for testing
     
     while hands_played < num_hands:
+        if checkpoint is not None and hands_played >= checkpoint.next_check and checkpoint.due(hands_played):
+            results = _session_results(game, hands_played, starting_credits, min_credits, max_credits, total_bets,
+                                       total_winnings, winning_hands, hand_types, stats)
+            checkpoint.save(_checkpoint_state(game, results, history))
+            if checkpoint.interrupted:
+                game_logger.summary("Interrupted after %d hands; continue with --resume", hands_played)
+                break
+        if precision is not None and stats.precise_enough(precision):
+            break
         # Place bet
         if game.place_bet(bet_amount):
             total_bets += bet_amount
             hands_played += 1
-            game_logger.info(f"\nHand {hands_played}: Placed bet of {bet_amount} credits")
+            game_logger.info("\nHand %d: Placed bet of %d credits", hands_played, bet_amount)
             
             # Deal initial hand
             game.deal_initial_hand()
-            initial_hand = [str(card) for card in game.hand]
-            game_logger.info(f"Initial hand: {initial_hand}")
+            log_hand = game_logger.is_enabled(logging.INFO)
+            if log_hand:
+                game_logger.info("Initial hand: %s", [str(card) for card in game.hand])
             
             # Make hold decisions
+            hold_mask = strategy(game.hand)
             held_cards = []
             for i, card in enumerate(game.hand):
-                if should_hold_card(card, game.hand):
+                if hold_mask >> i & 1:
                     game.hold_card(i)
-                    held_cards.append(str(card))
+                    if log_hand:
+                        held_cards.append(str(card))
             
-            game_logger.info(f"Held cards: {held_cards}")
+            game_logger.info("Held cards: %s", held_cards)
             
             # Draw new cards
             game.draw_new_cards()
-            final_hand = [str(card) for card in game.hand]
-            game_logger.info(f"Final hand: {final_hand}")
+            if log_hand:
+                game_logger.info("Final hand: %s", [str(card) for card in game.hand])
             
             # Evaluate hand
             hand_type, winnings = game.evaluate_hand()
+            stats.add(bet_amount, winnings, hand_type)
             if winnings > 0:
                 winning_hands += 1
                 total_winnings += winnings
                 hand_types[hand_type] = hand_types.get(hand_type, 0) + 1
             
             # Log hand details
-            game_logger.info(f"Hand type: {hand_type}")
-            game_logger.info(f"Winnings: {winnings}")
+            game_logger.info("Hand type: %s", hand_type)
+            game_logger.info("Winnings: %d", winnings)
             
             # Collect winnings and update stats
             game.collect_winnings(winnings)
@@ -89,36 +154,231 @@ def simulate_game(num_hands=25):
             max_credits = max(max_credits, current_credits)
             
             # Get current profit stats
-            stats = game.get_profit_stats()
-            game_logger.info(f"Current credits: {current_credits}")
-            game_logger.info(f"Current profit/loss: {stats['net_profit']} ({stats['profit_percentage']:.1f}%)")
-            game_logger.info(f"Session high: {stats['max_credits']}, Session low: {stats['min_credits']}")
+            if log_hand:
+                profit = game.get_profit_stats()
+                game_logger.info("Current credits: %d", current_credits)
+                game_logger.info("Current profit/loss: %d (%.1f%%)", profit['net_profit'], profit['profit_percentage'])
+                game_logger.info("Session high: %d, Session low: %d", profit['max_credits'], profit['min_credits'])
+        else:
+            game_logger.warning("Cannot cover a bet of %d with %d credits, stopping", bet_amount, game.credits)
+            break
     
-    # Final statistics
-    net_profit = game.credits - starting_credits
-    win_rate = (winning_hands / hands_played) * 100 if hands_played > 0 else 0
-    return_rate = (total_winnings / total_bets) * 100 if total_bets > 0 else 0
+    results = _session_results(game, hands_played, starting_credits, min_credits, max_credits, total_bets,
+                               total_winnings, winning_hands, hand_types, stats)
+    if checkpoint is not None and not checkpoint.interrupted:
+        checkpoint.save(_checkpoint_state(game, results, history))
+    return results
+
+def log_results(results):
+    """Log the final statistics of a session"""
+    hands_played = results['hands_played']
+    net_profit = results['final_credits'] - results['starting_credits']
+    win_rate = (results['winning_hands'] / hands_played) * 100 if hands_played > 0 else 0
+    return_rate = (results['total_winnings'] / results['total_bets']) * 100 if results['total_bets'] > 0 else 0
     
-    game_logger.info("\n=== Endurance Test Results ===")
-    game_logger.info(f"Hands played: {hands_played}")
-    game_logger.info(f"Starting credits: {starting_credits}")
-    game_logger.info(f"Final credits: {game.credits}")
-    game_logger.info(f"Minimum credits: {min_credits}")
-    game_logger.info(f"Maximum credits: {max_credits}")
-    game_logger.info(f"Net profit/loss: {net_profit}")
-    game_logger.info(f"Total bets: {total_bets}")
-    game_logger.info(f"Total winnings: {total_winnings}")
-    game_logger.info(f"Winning hands: {winning_hands}")
-    game_logger.info(f"Win rate: {win_rate:.1f}%")
-    game_logger.info(f"Return rate: {return_rate:.1f}%")
-    game_logger.info("\nHand type breakdown:")
-    for hand_type, count in hand_types.items():
-        game_logger.info(f"{hand_type}: {count} times")
+    game_logger.summary("\n=== Endurance Test Results ===")
+    game_logger.summary("Hands played: %d", hands_played)
+    game_logger.summary("Starting credits: %d", results['starting_credits'])
+    game_logger.summary("Final credits: %d", results['final_credits'])
+    game_logger.summary("Minimum credits: %d", results['min_credits'])
+    game_logger.summary("Maximum credits: %d", results['max_credits'])
+    game_logger.summary("Net profit/loss: %d", net_profit)
+    game_logger.summary("Total bets: %d", results['total_bets'])
+    game_logger.summary("Total winnings: %d", results['total_winnings'])
+    game_logger.summary("Winning hands: %d", results['winning_hands'])
+    game_logger.summary("Win rate: %.1f%%", win_rate)
+    game_logger.summary("Return rate: %.1f%%", return_rate)
+    stats = results.get('stats')
+    if stats is not None and stats.count > 1:
+        low, high = stats.rtp_ci()
+        game_logger.summary("Return per credit: %.4f%% +/- %.4f%% (95%% CI %.4f%% to %.4f%%)",
+                            stats.mean * 100, stats.ci_half_width() * 100, low * 100, high * 100)
+        game_logger.summary("Standard deviation per hand: %.4f bets", stats.std_dev)
+    game_logger.summary("\nHand type breakdown:")
+    for hand_type, count in results['hand_types'].items():
+        game_logger.summary("%s: %d times", hand_type, count)
+
+def simulate_game(num_hands=25, strategy=None, rng=None, starting_credits=100, history=None, variant=None,
+                  precision=None, checkpoint=None, resume=False):
+    """Run an endurance test of the game without graphical display"""
+    results = play_session(num_hands, strategy, rng, starting_credits, history, variant, precision, checkpoint,
+                           resume)
+    log_results(results)
+    return results['hands_played'], results['final_credits']
+
+def play_batch_session(num_hands, rng, starting_credits=100, bet_amount=5, variant=None):
+    """Same statistics as play_session, computed with the vectorized batch engine"""
+    variant = get_variant(variant)
+    batch = simulate_batch(num_hands, bet=bet_amount, rng=rng, keep_payouts=True, variant=variant)
+    payouts, categories = batch['payouts'], batch['categories']
+    credits_before = starting_credits + np.concatenate(([0], np.cumsum(payouts - bet_amount)[:-1]))
+    # Stop where play_session would: at the first hand the credits cannot cover
+    broke = np.flatnonzero(credits_before < bet_amount)
+    if len(broke):
+        payouts = payouts[:broke[0]]
+        categories = categories[:broke[0]]
+    path = starting_credits + np.cumsum(payouts - bet_amount)
+    winners = payouts[payouts > 0]
+    counts = np.bincount(categories[payouts > 0], minlength=len(variant.hand_names))
+    hand_types = {variant.hand_names[category]: int(count) for category, count in enumerate(counts) if count}
+    stats = SessionStats()
+    stats.add_array(payouts, bet_amount, categories, variant.hand_names)
+    return {
+        'hands_played': len(payouts),
+        'starting_credits': starting_credits,
+        'final_credits': int(path[-1]) if len(path) else starting_credits,
+        'min_credits': min(starting_credits, int(path.min())) if len(path) else starting_credits,
+        'max_credits': max(starting_credits, int(path.max())) if len(path) else starting_credits,
+        'total_bets': len(payouts) * bet_amount,
+        'total_winnings': int(payouts.sum()),
+        'winning_hands': len(winners),
+        'hand_types': hand_types,
+        'stats': stats,
+    }
+
+def _shard_rng(seed_sequence):
+    # The random.Random a non-batch shard plays with
+    return random.Random(int.from_bytes(seed_sequence.generate_state(4).tobytes(), 'little'))
+
+def _run_shard(shard):
+    num_hands, seed_sequence, starting_credits, use_batch, log_profile, variant = shard
+    # A forked worker inherits the handlers but not the background writer thread
+    game_logger.configure(log_profile)
+    if use_batch:
+        return play_batch_session(num_hands, np.random.default_rng(seed_sequence), starting_credits, variant=variant)
+    return play_session(num_hands, rng=_shard_rng(seed_sequence), starting_credits=starting_credits, variant=variant)
+
+def merge_results(shards):
+    """Merge shard statistics as if the shards were played back to back by one player"""
+    starting_credits = shards[0]['starting_credits']
+    merged = {
+        'hands_played': 0,
+        'starting_credits': starting_credits,
+        'final_credits': starting_credits,
+        'min_credits': starting_credits,
+        'max_credits': starting_credits,
+        'total_bets': 0,
+        'total_winnings': 0,
+        'winning_hands': 0,
+        'hand_types': {},
+        'stats': SessionStats(),
+    }
+    for shard in shards:
+        # Shift the shard's credit extremes onto the running balance
+        offset = merged['final_credits'] - shard['starting_credits']
+        merged['min_credits'] = min(merged['min_credits'], shard['min_credits'] + offset)
+        merged['max_credits'] = max(merged['max_credits'], shard['max_credits'] + offset)
+        merged['final_credits'] = shard['final_credits'] + offset
+        for key in ('hands_played', 'total_bets', 'total_winnings', 'winning_hands'):
+            merged[key] += shard[key]
+        for hand_type, count in shard['hand_types'].items():
+            merged['hand_types'][hand_type] = merged['hand_types'].get(hand_type, 0) + count
+        merged['stats'].merge(shard['stats'])
+    return merged
+
+def simulate_parallel(num_hands, workers=None, seed=None, starting_credits=100, use_batch=False, variant=None,
+                      precision=None, round_hands=100000):
+    """Run an endurance test sharded across worker processes.
+
+    Each shard gets its own RNG stream spawned from one SeedSequence, so the
+    same seed and worker count reproduce the same results exactly. With
+    precision, hands are played in rounds of round_hands until the 95%
+    confidence interval of the return is narrower than +/- precision, or
+    num_hands have been played.
+    """
+    workers = workers or os.cpu_count() or 1
+    root_sequence = np.random.SeedSequence(seed)
     
-    return hands_played, game.credits
+    start = time.perf_counter()
+    shard_results = []
+    stats = SessionStats()
+    remaining = num_hands
+    with multiprocessing.Pool(workers) as pool:
+        while remaining > 0:
+            round_size = min(remaining, round_hands) if precision is not None else remaining
+            seed_sequences = root_sequence.spawn(workers)
+            shards = [(round_size // workers + (1 if i < round_size % workers else 0), seed_sequences[i],
+                       starting_credits, use_batch, game_logger.profile, variant) for i in range(workers)]
+            for shard in pool.map(_run_shard, shards):
+                shard_results.append(shard)
+                stats.merge(shard['stats'])
+            remaining -= round_size
+            if precision is not None and stats.precise_enough(precision):
+                break
+    results = merge_results(shard_results)
+    elapsed = time.perf_counter() - start
+    
+    log_results(results)
+    game_logger.summary("%d hands on %d workers in %.2fs (%.0f hands/sec)",
+                        results['hands_played'], workers, elapsed, results['hands_played'] / elapsed)
+    return results
 
 if __name__ == "__main__":
-    hands_played, final_credits = simulate_game(25)  # Run 25 hands
-    print(f"\nEndurance test complete!")
+    parser = argparse.ArgumentParser(description="Headless endurance test")
+    parser.add_argument('--hands', type=int, default=25)
+    parser.add_argument('--workers', type=int, default=1, help="worker processes (0 = all cores)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--credits', type=int, default=100, help="starting credits of each worker's session")
+    parser.add_argument('--batch', action='store_true', help="use the vectorized batch engine in the workers")
+    parser.add_argument('--log-profile', choices=game_logger.PROFILES, default=game_logger.profile,
+                        help="debug logs every step, simulation keeps only session summaries")
+    parser.add_argument('--history', help="append a binary record of every hand to this file (single worker only)")
+    parser.add_argument('--variant', choices=list(VARIANT_DEFINITIONS), default=DEFAULT_VARIANT)
+    parser.add_argument('--precision', type=float, metavar='X',
+                        help="stop once the 95%% CI of the return is within +/- X (e.g. 0.005); "
+                             "--hands becomes the maximum")
+    parser.add_argument('--rules', metavar='PATH',
+                        help="play a hold-priority list from game.strategy_compiler instead of optimal holds "
+                             "(single worker only)")
+    parser.add_argument('--risk', metavar='MODE',
+                        help="hold by a risk-adjusted utility instead of EV: variance[:K] (mean - K x variance) "
+                             "or ruin[:HANDS] (lowest chance of going broke within HANDS hands); single worker only")
+    parser.add_argument('--checkpoint', metavar='PATH',
+                        help="snapshot the session to this file periodically and at the end (single worker only)")
+    parser.add_argument('--checkpoint-interval', type=float, default=60.0, metavar='SECONDS')
+    parser.add_argument('--resume', action='store_true', help="continue from the --checkpoint file")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    if (args.history or args.rules or args.risk or args.checkpoint) and (args.workers != 1 or args.batch):
+        parser.error("--history, --rules, --risk and --checkpoint play in a single process; "
+                     "drop --workers and --batch")
+    if args.rules and args.risk:
+        parser.error("choose either --rules or --risk")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+    game_logger.configure(args.log_profile)
+    
+    checkpoint = Checkpoint(args.checkpoint, args.checkpoint_interval) if args.checkpoint else None
+    with metrics.instrumented(args), checkpoint.catching_interrupts() if checkpoint else contextlib.nullcontext():
+        if (args.history or args.rules or args.risk or checkpoint
+                or (args.workers == 1 and args.seed is None and not args.batch)):
+            strategy = None
+            if args.rules:
+                from game.strategy_compiler import RuleStrategy
+                strategy = RuleStrategy.load(args.rules, args.variant)
+            elif args.risk:
+                from game.risk import RiskStrategy
+                try:
+                    strategy = RiskStrategy.parse(args.risk, args.variant)
+                except ValueError as e:
+                    parser.error(str(e))
+            rng = None
+            if args.seed is not None:
+                # Seeded like simulate_parallel's single worker, so extra flags do not change the hands
+                rng = _shard_rng(np.random.SeedSequence(args.seed).spawn(1)[0])
+            history = HandHistoryWriter(args.history) if args.history else None
+            hands_played, final_credits = simulate_game(args.hands, strategy, rng, args.credits, history,
+                                                        args.variant, args.precision, checkpoint, args.resume)
+            if history is not None:
+                history.close()
+        else:
+            # Worker processes are not instrumented; --metrics times the parent process only
+            results = simulate_parallel(args.hands, args.workers, args.seed, args.credits, args.batch,
+                                        args.variant, args.precision)
+            hands_played, final_credits = results['hands_played'], results['final_credits']
+    if checkpoint is not None and checkpoint.interrupted:
+        print(f"\nEndurance test interrupted; continue with --resume")
+    else:
+        print(f"\nEndurance test complete!")
     print(f"Hands played: {hands_played}")
     print(f"Final credits: {final_credits}")
@@ -1,10 +1,44 @@
 import os
+import time
 import pygame
+from concurrent.futures import ProcessPoolExecutor
 from game.poker_game import PokerGame
 from game.logger import game_logger
+from game.solver import hold_evs
+from game.variants import get_variant
+from ui.sprites import LazyFont, SpriteCache
 import logging
 
+def _lower_priority():
+    # Advisor worker: on a busy or single-core machine, the render loop goes first
+    if hasattr(os, 'nice'):
+        os.nice(10)
+
+
+def _warm_up(variant_name):
+    # Compile the variant's tables in the worker before the first hand needs them
+    get_variant(variant_name).payout_table
+
+
+def _warm_up_risk(spec, variant_name):
+    from game.risk import RiskStrategy
+    RiskStrategy.parse(spec, variant_name).prepare()
+
+
+def _risk_advice(spec, variant_name, codes, credits, bet):
+    # Advisor worker: the risk mode's hold with its score, and the score of the highest-EV hold
+    from game.risk import RiskStrategy
+    strategy = RiskStrategy.parse(spec, variant_name)
+    scores, means = strategy.scores(codes, credits, bet)
+    mask = strategy.choose(scores, means)
+    return mask, float(scores[mask]), float(scores[max(range(32), key=means.__getitem__)])
+
+
 class GameWindow:
+    # Timer event that ends the result display, and how long the result stays up
+    RESULT_EVENT = pygame.USEREVENT
+    RESULT_DISPLAY_MS = 2000
+    
     # Colors
     BLACK = (0, 0, 0)
     WHITE = (255, 255, 255)
@@ -14,7 +48,17 @@ class GameWindow:
     GOLD = (218, 165, 32)
     GRAY = (128, 128, 128)
     
-    def __init__(self, screen, game: PokerGame):
+    # EV shortfall below which a hold counts as optimal (ties between holds)
+    MISTAKE_EPSILON = 1e-9
+    
+    # Fonts, looked up when first drawn with
+    title_font = LazyFont(36)
+    text_font = LazyFont(24)
+    card_font = LazyFont(40)  # For card ranks
+    big_font = LazyFont(48)  # For big announcements
+    small_font = LazyFont(20)  # For the strategy advisor
+    
+    def __init__(self, screen, game: PokerGame, advisor=False, risk=None):
         self.logger = logging.getLogger('game_window')
         self.logger.setLevel(logging.DEBUG)
         self.screen = screen
@@ -27,10 +71,6 @@ class GameWindow:
         self.CARD_HEIGHT = 145
         self.CORNER_RADIUS = 10
         
-        # Load suit images
-        self.suit_images = {}
-        self.load_suit_images()
-        
         # Calculate card positions
         self.CARD_SPACING = 20
         total_width = (self.CARD_WIDTH * 5) + (self.CARD_SPACING * 4)
@@ -45,114 +85,169 @@ class GameWindow:
         
         # Hold buttons
         self.hold_buttons = [None] * 5  # Initialize array for hold button rectangles
+        self.hold_rects = [pygame.Rect(x, y + self.CARD_HEIGHT + 10, self.CARD_WIDTH, self.hold_button_height)
+                           for x, y in self.card_positions]
+        
+        # Card faces, card back and buttons, each rendered once
+        self.sprites = SpriteCache(self.CARD_WIDTH, self.CARD_HEIGHT, self.CORNER_RADIUS)
         
-        # Initialize fonts
-        pygame.font.init()
-        self.title_font = pygame.font.SysFont('Arial', 36)
-        self.text_font = pygame.font.SysFont('Arial', 24)
-        self.card_font = pygame.font.SysFont('Arial', 40)  # For card ranks
-        self.big_font = pygame.font.SysFont('Arial', 48)  # For big announcements
+        # Compile the variant's lookup table now rather than on the first draw
+        game.variant.category_table
         
-        # Win message
+        # Screen regions redrawn independently: the text header, one slot per
+        # card (card and HOLD button) and the bet/deal/draw controls
+        self.header_rect = pygame.Rect(0, 0, self.width, 160)
+        self.slot_rects = [pygame.Rect(x, y, self.CARD_WIDTH, self.CARD_HEIGHT + 10 + self.hold_button_height)
+                           for x, y in self.card_positions]
+        self.controls_rect = pygame.Rect((self.width - 5 * 120) // 2, self.height - 150, 5 * 120, 110)
+        self.advisor_rect = pygame.Rect(0, self.card_positions[0][1] + self.CARD_HEIGHT + 10 + self.hold_button_height,
+                                        self.width, 64)
+        self._drawn = {}  # Region -> state it was last drawn in
+        
+        # Win message, shown over the final hand until RESULT_EVENT fires or
+        # the player clicks or presses a key; the winnings are paid then
         self.show_win_message = False
         self.win_message = ""
+        self.pending_winnings = None
         
         # Endurance test mode
         self.endurance_mode = False
         self.hands_played = 0
         self.total_hands = 0
         self.starting_credits = 0
+        self.endurance_paused = False
+        self.endurance_done = False
+        self.endurance_strategy = None
+        self.endurance_bet = 5
+        self.endurance_winnings = None  # Winnings of the last auto-played hand, still on screen
+        self.hands_per_sec = 0.0
+        self._rate_hands = 0
+        self._rate_start = 0.0
         
-    def load_suit_images(self):
-        cards_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'cards')
+        # Strategy advisor (toggled with H): EVs of every hold of the dealt hand are
+        # solved in a worker process, so neither the solve (up to ~15 ms) nor the
+        # interpreter lock it holds ever delays a frame
+        self.advisor = advisor
+        self._advisor_pool = None
+        self._advice_codes = None  # Hand the advice is for
+        self._advice = None  # Future of its 32 hold EVs
+        self.risk = risk  # Optional game.risk.RiskStrategy spec: its hold is shown next to the best EV hold
+        self._risk_label = None
+        if risk is not None:
+            from game.risk import RiskStrategy
+            self._risk_label = RiskStrategy.parse(risk, game.variant).label
+        self._risk_advice = None  # Future of (hold mask, its score, best-EV hold's score)
+        self._advice_shown = False  # Whether a frame has been requested since the EVs arrived
+        self._decisions = []  # (future, hold mask, bet) of drawn hands not yet scored
+        self.ev_lost = 0.0  # Credits of expected value given away this session
+        self.mistakes = 0
+        self.decisions = 0
+        if advisor:
+            self._start_advisor()
         
-        # Load suit images
-        for suit in ['heart', 'diamond', 'club', 'spade']:
-            filepath = os.path.join(cards_dir, f'suit-{suit}.png')
-            image = pygame.image.load(filepath)
-            # Scale suit image smaller for sharper appearance
-            scaled_size = (self.CARD_WIDTH // 4, self.CARD_WIDTH // 4)  
-            self.suit_images[suit] = pygame.transform.scale(image, scaled_size)
-            
-    def draw_rounded_rect(self, surface, color, rect, radius):
-        """Draw a rounded rectangle"""
-        pygame.draw.rect(surface, color, rect, border_radius=radius)
+        # A game restored mid-hand (see game/persistence.py) may be waiting to be paid
+        if game.game_state == "evaluating":
+            self.show_result()
         
     def draw_card(self, card, x, y, face_up=True, card_index=None):
-        self.logger.debug(f"Drawing card {card_index+1}: {card} at position ({x}, {y})")
-        
-        # Draw card background
-        card_rect = pygame.Rect(x, y, self.CARD_WIDTH, self.CARD_HEIGHT)
+        self.logger.debug("Drawing card %s: %s at position (%d, %d)", card_index, card, x, y)
         
         if not face_up:
-            # Draw card back
-            self.draw_rounded_rect(self.screen, self.BLUE, card_rect, self.CORNER_RADIUS)
-            # Add pattern to card back
-            pattern_rect = card_rect.inflate(-20, -20)
-            pygame.draw.rect(self.screen, self.WHITE, pattern_rect, 2, border_radius=self.CORNER_RADIUS)
+            self.screen.blit(self.sprites.back(), (x, y))
             return
-            
-        # Draw white card face with black border
-        self.draw_rounded_rect(self.screen, self.WHITE, card_rect, self.CORNER_RADIUS)
-        pygame.draw.rect(self.screen, self.BLACK, card_rect, 2, border_radius=self.CORNER_RADIUS)
+        self.screen.blit(self.sprites.face(card), (x, y))
         
-        # Set color based on suit
-        color = self.RED if card.suit in ['♥', '♦'] else self.BLACK
-        
-        # Draw rank in corners
-        rank_text = self.card_font.render(card.rank, True, color)
-        small_rank = self.text_font.render(card.rank, True, color)
-        
-        # Top-left rank
-        self.screen.blit(rank_text, (x + 5, y + 5))
-        
-        # Bottom-right rank (upside down)
-        rotated_rank = pygame.transform.rotate(small_rank, 180)
-        self.screen.blit(rotated_rank, (x + self.CARD_WIDTH - 25, y + self.CARD_HEIGHT - 25))
+        # Draw hold button if in holding state
+        if self.game.game_state == "holding" and card_index is not None:
+            hold_rect = self.hold_rects[card_index]
+            self.screen.blit(self.sprites.hold_button(self.game.hand[card_index].held, hold_rect.height), hold_rect)
+            
+    def invalidate(self):
+        """Redraw the whole screen on the next draw(), e.g. after something else drew over it"""
+        self._drawn.clear()
         
-        # Map card suit to image key
-        suit_map = {'♠': 'spade', '♥': 'heart', '♦': 'diamond', '♣': 'club'}
-        suit_key = suit_map[card.suit]
-        suit_image = self.suit_images[suit_key]
+    def _region_states(self):
+        # What each region shows; a region is redrawn only when its state changes
+        game = self.game
+        holding = game.game_state == "holding"
+        states = {
+            'header': (self.endurance_mode, self.hands_played, self.total_hands, self.starting_credits,
+                       round(self.hands_per_sec), self.endurance_paused, self.endurance_done,
+                       game.credits, game.current_bet, game.starting_credits, game.max_credits, game.min_credits),
+            'controls': (game.game_state, min(game.credits, 5) if game.current_bet == 0 else 0, game.current_bet > 0),
+            'advisor': self._advisor_state(),
+        }
+        for i in range(5):
+            if i < len(game.hand):
+                card = game.hand[i]
+                states[i] = (card.code, game.face_up[i], holding, holding and card.held)
+            else:
+                states[i] = None
+        return states
         
-        # Draw suit image in center (slightly smaller)
-        suit_rect = suit_image.get_rect()
-        suit_rect.center = (x + self.CARD_WIDTH // 2, y + self.CARD_HEIGHT // 2)
-        self.screen.blit(suit_image, suit_rect)
+    def draw(self):
+        """Compose the frame from cached sprites and update only the regions that changed"""
+        states = self._region_states()
+        overlay = self.win_message if self.show_win_message else None
+        dirty = [region for region, state in states.items() if self._drawn.get(region, ()) != state]
+        # The win overlay dims the whole screen, so showing or hiding it, or
+        # anything changing under it, redraws everything
+        full = not self._drawn or self._drawn.get('overlay') != overlay or (overlay is not None and dirty)
+        if full:
+            self.screen.fill(self.BLACK)
+            dirty = list(states)
+        elif not dirty:
+            return
         
-        # Draw small suits in corners (even smaller for corners)
-        small_suit = pygame.transform.scale(suit_image, 
-                                         (suit_image.get_width() // 3,  
-                                          suit_image.get_height() // 3))
+        # Hold buttons are clickable only while holding
+        holding = self.game.game_state == "holding"
+        self.hold_buttons = [self.hold_rects[i] if holding and i < len(self.game.hand) else None for i in range(5)]
         
-        # Top-left suit
-        self.screen.blit(small_suit, (x + 5, y + 30))
+        rects = []
+        for region in dirty:
+            if region == 'header':
+                rect = self.header_rect
+                self.screen.fill(self.BLACK, rect)
+                self.draw_header()
+            elif region == 'controls':
+                rect = self.controls_rect
+                self.screen.fill(self.BLACK, rect)
+                self.draw_controls()
+            elif region == 'advisor':
+                rect = self.advisor_rect
+                self.screen.fill(self.BLACK, rect)
+                if states[region] is not None:
+                    self.draw_advisor()
+            else:
+                rect = self.slot_rects[region]
+                if states[region] is None:
+                    self.screen.fill(self.BLACK, rect)
+                else:
+                    # The card sprite is opaque; only the HOLD button strip may need clearing
+                    if not holding:
+                        self.screen.fill(self.BLACK, self.hold_rects[region])
+                    card_x, card_y = self.card_positions[region]
+                    self.draw_card(self.game.hand[region], card_x, card_y, self.game.face_up[region],
+                                   card_index=region)
+            rects.append(rect)
+            self._drawn[region] = states[region]
         
-        # Bottom-right suit (rotated)
-        rotated_suit = pygame.transform.rotate(small_suit, 180)
-        self.screen.blit(rotated_suit, 
-                        (x + self.CARD_WIDTH - 15 - small_suit.get_width(),  
-                         y + self.CARD_HEIGHT - 45))
+        if overlay is not None:
+            self.draw_win_message()
+        self._drawn['overlay'] = overlay
         
-        # Draw hold button if in holding state
-        if self.game.game_state == "holding" and card_index is not None:
-            hold_rect = pygame.Rect(x, y + self.CARD_HEIGHT + 10, self.CARD_WIDTH, 30)
-            self.hold_buttons[card_index] = hold_rect  # Store the hold button rect for click detection
-            color = self.RED if self.game.hand[card_index].held else self.GRAY
-            pygame.draw.rect(self.screen, color, hold_rect)
-            hold_text = self.text_font.render("HOLD", True, self.WHITE)
-            text_rect = hold_text.get_rect(center=hold_rect.center)
-            self.screen.blit(hold_text, text_rect)
-            self.logger.debug(f"Drew HOLD text for card {card_index+1}")
-            
-    def draw(self):
-        # Clear screen
-        self.screen.fill(self.BLACK)
+        if full:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
         
+    def draw_header(self):
         # Draw title
         if self.endurance_mode:
             title = self.title_font.render("Endurance Test Mode", True, self.RED)
-            stats = self.text_font.render(f"Hand {self.hands_played}/{self.total_hands}", True, self.WHITE)
+            status = " | PAUSED" if self.endurance_paused else " | DONE" if self.endurance_done else ""
+            stats = self.text_font.render(f"Hand {self.hands_played}/{self.total_hands} | "
+                                          f"{self.hands_per_sec:,.0f} hands/sec{status}", True, self.WHITE)
             profit_loss = self.game.credits - self.starting_credits
             profit_color = self.GREEN if profit_loss >= 0 else self.RED
             profit_text = self.text_font.render(f"Profit/Loss: {profit_loss}", True, profit_color)
@@ -161,19 +256,12 @@ class GameWindow:
             self.screen.blit(stats, ((self.width - stats.get_width()) // 2, 60))
             self.screen.blit(profit_text, ((self.width - profit_text.get_width()) // 2, 90))
         else:
-            title = self.title_font.render("Jacks or Better", True, self.GOLD)
+            title = self.title_font.render(self.game.variant.title, True, self.GOLD)
             self.screen.blit(title, ((self.width - title.get_width()) // 2, 20))
         
         self.draw_credits_and_bet()
         
-        # Initialize hold buttons array
-        self.hold_buttons = [None] * 5
-        
-        # Draw cards
-        for i, card in enumerate(self.game.hand):
-            card_x, card_y = self.card_positions[i]
-            self.draw_card(card, card_x, card_y, self.game.face_up[i], card_index=i)
-                
+    def draw_controls(self):
         # Draw buttons based on game state
         if self.game.game_state == "betting":
             # Draw bet buttons in a row
@@ -189,7 +277,7 @@ class GameWindow:
         elif self.game.game_state == "holding":
             self.draw_button("Draw", self.width//2 - 50, self.height - 80, 100, 40)
             
-        # Draw win message if active
+    def draw_win_message(self):
         if self.show_win_message:
             # Create a semi-transparent overlay
             overlay = pygame.Surface((self.width, self.height))
@@ -207,8 +295,6 @@ class GameWindow:
             pygame.draw.rect(self.screen, self.GOLD, bg_rect, 3)  # Gold border
             
             self.screen.blit(message_surface, message_rect)
-            
-        pygame.display.flip()
         
     def draw_credits_and_bet(self):
         # Draw credits
@@ -236,28 +322,247 @@ class GameWindow:
 
     def handle_draw_button(self):
         if self.game.game_state == "holding":
+            if self.advisor and self._advisor_pool is not None:
+                # Scored by poll_advisor once the EVs are in
+                codes = tuple(card.code for card in self.game.hand)
+                future = self._advice
+                if codes != self._advice_codes:
+                    # Drawn before poll_advisor saw this hand: the advice is still for the previous one
+                    future = self._advisor_pool.submit(hold_evs, codes, self.game.variant.name)
+                self._decisions.append((future, self._hold_mask(), self.game.current_bet))
             self.game.draw_new_cards()
             self.game.reveal_cards()  # Make sure all cards are face up
-            hand_type, winnings = self.game.evaluate_hand()
+            self.show_result()
             
-            if winnings > 0:
-                self.show_win_message = True
-                self.win_message = f"{hand_type}! You won {winnings} credits!"
-            else:
-                self.show_win_message = True
-                self.win_message = "No Win. Better luck next time!"
-                
-            self.draw()  # Update display to show final hand
-            pygame.display.flip()  # Make sure changes are shown
-            pygame.time.delay(2000)  # Show final hand for 2 seconds
+    def show_result(self):
+        """Evaluate the drawn hand and show it until the winnings are collected"""
+        hand_type, winnings = self.game.evaluate_hand()
+        
+        if winnings > 0:
+            self.show_win_message = True
+            self.win_message = f"{hand_type}! You won {winnings} credits!"
+        else:
+            self.show_win_message = True
+            self.win_message = "No Win. Better luck next time!"
+            
+        # Show the final hand without blocking the event loop: the result
+        # is collected when the timer fires or the player skips it
+        self.pending_winnings = winnings
+        pygame.time.set_timer(self.RESULT_EVENT, self.RESULT_DISPLAY_MS, 1)
             
-            self.game.collect_winnings(winnings)  # This will also reset for next hand
-            self.show_win_message = False  # Clear the win message after collecting winnings
+    def finish_result(self):
+        """End the result display: pay the pending winnings and return to betting"""
+        pygame.time.set_timer(self.RESULT_EVENT, 0)  # Cancel the timer
+        if self.pending_winnings is not None:
+            self.game.collect_winnings(self.pending_winnings)  # This will also reset for next hand
+            self.pending_winnings = None
+        self.show_win_message = False  # Clear the win message after collecting winnings
             
+    def _hold_mask(self):
+        mask = 0
+        for i, card in enumerate(self.game.hand):
+            if card.held:
+                mask |= 1 << i
+        return mask
+        
+    def _start_advisor(self):
+        # Starting the worker takes a few milliseconds: do it before it is needed
+        if self._advisor_pool is None:
+            self._advisor_pool = ProcessPoolExecutor(max_workers=1, initializer=_lower_priority)
+            self._advisor_pool.submit(_warm_up, self.game.variant.name)
+            if self.risk is not None:
+                self._advisor_pool.submit(_warm_up_risk, self.risk, self.game.variant.name)
+        
+    def toggle_advisor(self):
+        self.advisor = not self.advisor
+        if self.advisor:
+            self._start_advisor()
+        game_logger.info("Strategy advisor %s", "on" if self.advisor else "off")
+        
+    def poll_advisor(self):
+        """Start solving a newly dealt hand and score drawn hands whose EVs have arrived.
+
+        Never waits for the worker. Called once per frame by the main loop;
+        returns True if the advisor display changed.
+        """
+        if not self.advisor or self.endurance_mode:
+            return False
+        changed = False
+        game = self.game
+        if game.game_state == "holding":
+            codes = tuple(card.code for card in game.hand)
+            if codes != self._advice_codes:
+                self._advice_codes = codes
+                self._advice = self._advisor_pool.submit(hold_evs, codes, game.variant.name)
+                if self.risk is not None:
+                    self._risk_advice = self._advisor_pool.submit(_risk_advice, self.risk, game.variant.name, codes,
+                                                                  game.credits, game.current_bet)
+                self._advice_shown = False
+                changed = True
+            elif not self._advice_shown and self._advice.done() and (self._risk_advice is None or
+                                                                     self._risk_advice.done()):
+                self._advice_shown = True
+                changed = True
+        while self._decisions and self._decisions[0][0].done():
+            future, mask, bet = self._decisions.pop(0)
+            evs = future.result()
+            lost = (max(evs) - evs[mask]) * bet
+            self.decisions += 1
+            if lost > self.MISTAKE_EPSILON:
+                self.mistakes += 1
+                self.ev_lost += lost
+                game_logger.info("Hold %s gave away %.4f credits of expected value", bin(mask), lost)
+            changed = True
+        return changed
+        
+    def _advisor_state(self):
+        if not self.advisor or self.endurance_mode:
+            return None
+        game = self.game
+        evs = risk = None
+        if game.game_state == "holding" and self._advice is not None and self._advice.done():
+            evs = self._advice.result()
+        if game.game_state == "holding" and self._risk_advice is not None and self._risk_advice.done():
+            risk = self._risk_advice.result()
+        return (game.game_state, game.current_bet, self._hold_mask() if game.game_state == "holding" else 0,
+                tuple(evs) if evs is not None else None, risk, self.decisions, self.mistakes, round(self.ev_lost, 2))
+        
+    def _held_cards(self, mask):
+        # Suit symbols are missing from many fonts: name cards by rank and position
+        held = [i for i in range(5) if mask >> i & 1]
+        if not held:
+            return "nothing"
+        return " ".join(self.game.hand[i].rank for i in held) + f" (cards {', '.join(str(i + 1) for i in held)})"
+        
+    def draw_advisor(self):
+        game = self.game
+        x, y = self.advisor_rect.x + 10, self.advisor_rect.y + 2
+        if game.game_state == "holding":
+            state = self._advisor_state()
+            evs, risk = state[3], state[4]
+            if evs is None:
+                line = "Advisor: solving..."
+            else:
+                mask = self._hold_mask()
+                best = max(range(32), key=evs.__getitem__)
+                line = (f"Your hold: EV {evs[mask] * game.current_bet:.3f}   "
+                        f"Best: EV {evs[best] * game.current_bet:.3f} holding {self._held_cards(best)}")
+            color = self.WHITE if evs is None or evs[mask] >= max(evs) - self.MISTAKE_EPSILON else self.GOLD
+            self.screen.blit(self.small_font.render(line, True, color), (x, y))
+            if risk is not None:
+                risk_mask, score, best_ev_score = risk
+                if self.risk.startswith('ruin'):
+                    # Scores are minus the probability of going broke
+                    values = f"{-score:.2%} holding {self._held_cards(risk_mask)} (best EV hold: {-best_ev_score:.2%})"
+                else:
+                    values = f"{score:.3f} holding {self._held_cards(risk_mask)} (best EV hold: {best_ev_score:.3f})"
+                self.screen.blit(self.small_font.render(f"{self._risk_label}: {values}", True, self.WHITE),
+                                 (x, y + 20))
+        tally = (f"EV lost to mistakes: {self.ev_lost:.2f} credits "
+                 f"({self.mistakes} of {self.decisions} hands)")
+        self.screen.blit(self.small_font.render(tally, True, self.WHITE), (x, y + 40))
+        
+    def start_endurance(self, total_hands, strategy=None, bet=5):
+        """Auto-play total_hands hands against the live game.
+
+        strategy maps the dealt hand to a hold mask (bit i holds card i), as in
+        test_endurance.py, and defaults to the optimal strategy. Hands are
+        played by run_endurance, called once per frame by the main loop.
+        """
+        if self.pending_winnings is not None:
+            self.finish_result()
+        self.endurance_mode = True
+        self.endurance_paused = False
+        self.endurance_done = False
+        self.hands_played = 0
+        self.total_hands = total_hands
+        self.starting_credits = self.game.credits
+        if hasattr(strategy, 'bind'):
+            strategy.bind(self.game)  # e.g. game.risk.RiskStrategy, which reads the credits and bet
+        self.endurance_strategy = strategy or (lambda hand: self.game.optimal_hold())
+        self.endurance_bet = bet
+        self._reset_rate()
+        game_logger.info("Starting UI endurance test with %d hands", total_hands)
+        
+    @property
+    def endurance_running(self):
+        return self.endurance_mode and not self.endurance_paused and not self.endurance_done
+        
+    def _reset_rate(self):
+        self.hands_per_sec = 0.0
+        self._rate_hands = 0
+        self._rate_start = time.perf_counter()
+        
+    def run_endurance(self, budget_ms):
+        """Play auto-play hands flat out for about budget_ms, then return so the frame can be drawn.
+
+        The last hand played stays on screen until the next call collects it.
+        Returns True if the screen needs redrawing.
+        """
+        if not self.endurance_running:
+            return False
+        game = self.game
+        strategy = self.endurance_strategy
+        now = time.perf_counter()
+        deadline = now + budget_ms / 1000
+        played = 0
+        while now < deadline:
+            if self.endurance_winnings is not None:
+                game.collect_winnings(self.endurance_winnings)
+                self.endurance_winnings = None
+            if self.hands_played >= self.total_hands or not game.place_bet(self.endurance_bet):
+                self.endurance_done = True
+                game_logger.info("UI endurance test finished after %d hands, credits: %d",
+                                 self.hands_played, game.credits)
+                break
+            game.deal_initial_hand()
+            hold_mask = strategy(game.hand)
+            for i in range(5):
+                if hold_mask >> i & 1:
+                    game.hold_card(i)
+            game.draw_new_cards()
+            self.endurance_winnings = game.evaluate_hand()[1]
+            self.hands_played += 1
+            played += 1
+            now = time.perf_counter()
+        
+        # Refresh the hands/sec counter about twice a second
+        self._rate_hands += played
+        elapsed = now - self._rate_start
+        if elapsed >= 0.5:
+            self.hands_per_sec = self._rate_hands / elapsed
+            self._rate_hands = 0
+            self._rate_start = now
+        return played > 0 or self.endurance_done
+        
+    def toggle_pause(self):
+        self.endurance_paused = not self.endurance_paused
+        if not self.endurance_paused:
+            self._reset_rate()
+        game_logger.info("UI endurance test %s", "paused" if self.endurance_paused else "resumed")
+        
     def handle_event(self, event):
         """Handle pygame events. Returns True if the event caused a state change that requires redrawing."""
+        if self.endurance_mode and not self.endurance_done:
+            # Auto-play owns the game: only pause/resume (P or space) is accepted
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_p, pygame.K_SPACE):
+                self.toggle_pause()
+                return True
+            return False
+        
+        if self.pending_winnings is not None:
+            # Showing a result: the timer ends it, and any click or key skips it
+            if event.type in (self.RESULT_EVENT, pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN):
+                self.finish_result()
+                return True
+            return False
+        
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+            self.toggle_advisor()
+            return True
+        
         if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = event.pos
             
             # Handle betting buttons
             if self.height - 150 <= mouse_pos[1] <= self.height - 110:
@@ -293,20 +598,8 @@ class GameWindow:
                     if card_rect.collidepoint(mouse_pos):
                         self.game.hold_card(i)
                         return True
-        
-        elif event.type == pygame.USEREVENT:
-            # Reset game after win message
-            if self.show_win_message:
-                self.show_win_message = False
-                pygame.time.set_timer(pygame.USEREVENT, 0)  # Cancel the timer
-                return True
-        
+
         return False  # No redraw needed
 
     def draw_button(self, text, x, y, width, height, active=True):
-        color = self.BLUE if active else self.GRAY
-        pygame.draw.rect(self.screen, color, (x, y, width, height))
-        text_surface = self.text_font.render(text, True, self.WHITE)
-        text_x = x + (width - text_surface.get_width()) // 2
-        text_y = y + (height - text_surface.get_height()) // 2
-        self.screen.blit(text_surface, (text_x, text_y))
+        self.screen.blit(self.sprites.button(text, width, height, active), (x, y))
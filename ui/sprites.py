@@ -0,0 +1,146 @@
+import os
+import pygame
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def load_font(name, size):
+    """SysFont lookup, shared and done once per font: the first one scans the system fonts"""
+    pygame.font.init()
+    return pygame.font.SysFont(name, size)
+
+class LazyFont:
+    """Class attribute that resolves to a font on first use instead of at construction"""
+
+    def __init__(self, size, name='Arial'):
+        self.size = size
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        return self if instance is None else load_font(self.name, self.size)
+
+class SpriteCache:
+    """Pre-rendered card faces, card back, HOLD buttons and button labels.
+
+    Every surface is rendered on first use and kept, so a frame is composed
+    from plain blits: no font rendering, scaling or rotation after the first
+    time a sprite is seen.
+    """
+    BLACK = (0, 0, 0)
+    WHITE = (255, 255, 255)
+    RED = (255, 0, 0)
+    BLUE = (0, 0, 255)
+    GRAY = (128, 128, 128)
+
+    SUIT_FILES = {'♠': 'spade', '♥': 'heart', '♦': 'diamond', '♣': 'club'}
+
+    card_font = LazyFont(40)  # Card ranks
+    text_font = LazyFont(24)  # Corner ranks and button labels
+
+    def __init__(self, card_width, card_height, corner_radius):
+        self.card_width = card_width
+        self.card_height = card_height
+        self.corner_radius = corner_radius
+        self.suit_images = {}  # Loaded with the first card face
+        self.small_suit_images = {}
+        self._faces = {}
+        self._back = None
+        self._hold_buttons = {}
+        self._buttons = {}
+
+    def load_suit_images(self):
+        cards_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'cards')
+        for suit, name in self.SUIT_FILES.items():
+            image = pygame.image.load(os.path.join(cards_dir, f'suit-{name}.png'))
+            # Scale suit image smaller for sharper appearance
+            suit_image = pygame.transform.scale(image, (self.card_width // 4, self.card_width // 4))
+            self.suit_images[suit] = suit_image
+            # Even smaller for the corners
+            self.small_suit_images[suit] = pygame.transform.scale(
+                suit_image, (suit_image.get_width() // 3, suit_image.get_height() // 3))
+
+    def _card_surface(self):
+        # Cards always sit on the black table, so the corners are plain black
+        # and the sprite can be blitted without per-pixel alpha
+        surface = pygame.Surface((self.card_width, self.card_height))
+        surface.fill(self.BLACK)
+        return surface
+
+    @staticmethod
+    def _finish(surface):
+        # Match the display's pixel format once, instead of on every blit
+        return surface.convert() if pygame.display.get_surface() is not None else surface
+
+    def face(self, card):
+        """Face of a Card, rendered once per rank and suit"""
+        key = (card.rank, card.suit)
+        surface = self._faces.get(key)
+        if surface is None:
+            surface = self._finish(self._render_face(card.rank, card.suit))
+            self._faces[key] = surface
+        return surface
+
+    def _render_face(self, rank, suit):
+        surface = self._card_surface()
+        card_rect = surface.get_rect()
+        w, h = self.card_width, self.card_height
+
+        # White card face with black border
+        pygame.draw.rect(surface, self.WHITE, card_rect, border_radius=self.corner_radius)
+        pygame.draw.rect(surface, self.BLACK, card_rect, 2, border_radius=self.corner_radius)
+
+        color = self.RED if suit in ['♥', '♦'] else self.BLACK
+
+        # Rank in the top-left corner, and upside down in the bottom-right one
+        surface.blit(self.card_font.render(rank, True, color), (5, 5))
+        small_rank = self.text_font.render(rank, True, color)
+        surface.blit(pygame.transform.rotate(small_rank, 180), (w - 25, h - 25))
+
+        # Suit in the center
+        if not self.suit_images:
+            self.load_suit_images()
+        suit_image = self.suit_images[suit]
+        surface.blit(suit_image, suit_image.get_rect(center=(w // 2, h // 2)))
+
+        # Small suits in the corners
+        small_suit = self.small_suit_images[suit]
+        surface.blit(small_suit, (5, 30))
+        surface.blit(pygame.transform.rotate(small_suit, 180), (w - 15 - small_suit.get_width(), h - 45))
+        return surface
+
+    def back(self):
+        """Card back"""
+        if self._back is None:
+            surface = self._card_surface()
+            card_rect = surface.get_rect()
+            pygame.draw.rect(surface, self.BLUE, card_rect, border_radius=self.corner_radius)
+            # Pattern on the card back
+            pygame.draw.rect(surface, self.WHITE, card_rect.inflate(-20, -20), 2, border_radius=self.corner_radius)
+            self._back = self._finish(surface)
+        return self._back
+
+    def hold_button(self, held, height=30):
+        """HOLD button shown under a card, red when the card is held"""
+        key = (held, height)
+        surface = self._hold_buttons.get(key)
+        if surface is None:
+            surface = pygame.Surface((self.card_width, height))
+            surface.fill(self.RED if held else self.GRAY)
+            hold_text = self.text_font.render("HOLD", True, self.WHITE)
+            surface.blit(hold_text, hold_text.get_rect(center=surface.get_rect().center))
+            surface = self._finish(surface)
+            self._hold_buttons[key] = surface
+        return surface
+
+    def button(self, text, width, height, active=True):
+        """Labelled button, blue when active and gray otherwise"""
+        key = (text, width, height, active)
+        surface = self._buttons.get(key)
+        if surface is None:
+            surface = pygame.Surface((width, height))
+            surface.fill(self.BLUE if active else self.GRAY)
+            text_surface = self.text_font.render(text, True, self.WHITE)
+            surface.blit(text_surface, ((width - text_surface.get_width()) // 2,
+                                        (height - text_surface.get_height()) // 2))
+            surface = self._finish(surface)
+            self._buttons[key] = surface
+        return surface